@@ -1,90 +1,82 @@
 import pandas as pd
 import folium
-from folium.plugins import MarkerCluster, LocateControl
+from folium.plugins import FastMarkerCluster, MarkerCluster, LocateControl
+from branca.element import Element
+import argparse
+import gzip
+import hashlib
+import json
 import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-# --- Load & Process Data ---
-def process_charging_ports_data(file_path):
-    charging_ports = pd.read_csv(file_path)
-    charging_ports["ports"] = 1
+try:
+    import brotli  # optional: only needed to write the .br variants
+except ImportError:
+    brotli = None
 
-    # Tesla L2
-    charging_ports['L2_Tesla'] = charging_ports['EV Network'].apply(lambda x: 1 if 'Tesla Destination' in str(x) else 0)
-    charging_ports['L2_Tesla'] = charging_ports.apply(
-        lambda row: 0 if row.get('EV J1772 Connector Count', 0) == 1 and row['L2_Tesla'] == 1 else row['L2_Tesla'],
-        axis=1
-    )
-
-    # Tesla L3
-    charging_ports['L3_Tesla'] = charging_ports.apply(
-        lambda row: 1 if row.get('EV J3400 Connector Count', 0) == 1 and row['L2_Tesla'] == 0 else 0,
-        axis=1
-    )
+# Share the data pipeline with the Streamlit app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from charging_data import (
+    PROCESSED_CACHE_FILE, aggregate_stations, compact_charging_ports, latest_stations_csv,
+    process_charging_ports_data, province_offsets, province_rows, station_keys, write_processed_cache,
+)
+from density_grid import DENSITY_GRID_FILE, build_density_grid, tile_coordinates, write_density_grid
+from map_shell import TILES_DIR
+from static_server import MANIFEST_FILE, load_manifest
 
-    # Adjust dual DCFC
-    DCFC_ports = charging_ports[charging_ports["EV DC Fast Count"] > 0]
-    filtered_df = DCFC_ports[(DCFC_ports['EV CHAdeMO Connector Count'] == 1) & (DCFC_ports['EV CCS Connector Count'] == 1)]
-    filtered_df.loc[:, 'EV CHAdeMO Connector Count'] = 0
-    filtered_df.loc[:, 'EV CCS Connector Count'] = 0
-    filtered_df.loc[:, 'ChademoCCSsingleuseport'] = 1
-
-    charging_ports.loc[filtered_df.index, ['EV CHAdeMO Connector Count', 'EV CCS Connector Count']] = \
-        filtered_df[['EV CHAdeMO Connector Count', 'EV CCS Connector Count']]
-    charging_ports.loc[filtered_df.index, 'ChademoCCSsingleuseport'] = 1
-
-    # L2 and L3 port flags
-    charging_ports["L2_port"] = charging_ports.apply(
-        lambda row: 1 if row.get("EV J1772 Connector Count", 0) > 0 or row.get("L2_Tesla", 0) > 0 else 0,
-        axis=1
-    )
-    charging_ports["L3_port"] = charging_ports.apply(
-        lambda row: 1 if (
-            row.get("EV CCS Connector Count", 0) > 0 or
-            row.get("EV CHAdeMO Connector Count", 0) > 0 or
-            row.get("ChademoCCSsingleuseport", 0) > 0 or
-            row.get("L3_Tesla", 0) > 0
-        ) else 0,
-        axis=1
-    )
+# Client-side marker factory for the bulk layers: one shared icon per layer, popup built from row[2]
+BULK_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.setIcon(L.AwesomeMarkers.icon({
+        markerColor: '%(color)s', iconColor: 'white', icon: '%(icon)s', prefix: 'fa', extraClasses: 'fa-rotate-0'
+    }));
+    marker.bindPopup(row[2], {maxWidth: '100%%'});
+    return marker;
+}"""
 
-    # Clean network names
-    network_name_mapping = {
-        'Tesla': 'Tesla',
-        'Tesla Destination': 'Tesla',
-        'Electrify Canada': 'Electrify Canada',
-        'SHELL_RECHARGE': 'Shell Recharge',
-        'PETROCAN': 'Petro Canada',
-        'COUCHE_TARD': 'Couche Tard/CircleK',
-        'CIRCLE_K': 'Couche Tard/CircleK',
-        'ON_THE_RUN_EV': 'On The Run EV (Parkland)',
-        'BCHYDRO': 'BC Hydro',
-        'Circuit électrique': 'Electric Circuit (Hydro Quebec)',
-        'IVY': 'Ivy (OPG and Hydro One)',
-        'eCharge Network': 'eCharge (NB power)',
-        'FORD_CHARGE': 'Ford Blue Oval'
-    }
-    charging_ports['Clean_Network_Name'] = charging_ports['EV Network'].map(network_name_mapping)
-
-    # Drop IVY stations outside Ontario
-    charging_ports = charging_ports[~((charging_ports['EV Network'] == 'IVY') & (charging_ports['State'] != 'ON'))]
-
-    return charging_ports
+RENDER_MODES = ("markers", "bulk")
 
 
 # --- Map Generator ---
-def plot_charging_map_by_province(df, province_code):
-    df = df[df['State'] == province_code].dropna(subset=['Latitude', 'Longitude']).copy()
+def plot_charging_map_by_province(df, province_code, render="markers", by_station=False, offsets=None):
+    """
+    Builds the folium map for one province. render="markers" creates one folium.Marker per point;
+    render="bulk" ships each level as a single [lat, lon, popup] array that a FastMarkerCluster
+    turns into markers in the browser. by_station=True draws one point per site instead of one
+    per charging port. offsets: province_offsets(df), when the caller already has them.
+    """
+    if offsets is None:
+        offsets = province_offsets(df)
+    df = province_rows(df, province_code, offsets).dropna(subset=['Latitude', 'Longitude']).copy()
     if df.empty:
         return None
 
+    df = station_points(df) if by_station else port_points(df)
+
     map_center = [df['Latitude'].mean(), df['Longitude'].mean()]
     ev_map = folium.Map(location=map_center, zoom_start=6)
 
+    if render == "bulk":
+        add_bulk_port_layers(df, ev_map)
+    else:
+        add_marker_port_layers(df, ev_map)
+
+    LocateControl(auto_start=False).add_to(ev_map)
+    folium.LayerControl(collapsed=False).add_to(ev_map)
+
+    return ev_map
+
+
+def add_marker_port_layers(df, ev_map):
     l2_cluster = MarkerCluster(name='Level 2 Charging').add_to(ev_map)
     l3_cluster = MarkerCluster(name='Level 3 Charging').add_to(ev_map)
 
     for _, row in df.iterrows():
-        popup_text = f"{row['Station Name']}<br>{row['Street Address']}<br>{row['City']}"
+        popup_text = row['popup']
         if row.get('L2_port', 0) == 1:
             folium.Marker(
                 location=[row['Latitude'], row['Longitude']],
@@ -98,29 +90,392 @@ def plot_charging_map_by_province(df, province_code):
                 icon=folium.Icon(color='red', icon='bolt', prefix='fa')
             ).add_to(l3_cluster)
 
-    LocateControl(auto_start=False).add_to(ev_map)
-    folium.LayerControl(collapsed=False).add_to(ev_map)
 
-    return ev_map
+def _address_popup(df):
+    return df['Station Name'].astype(str) + "<br>" + df['Street Address'].astype(str) + "<br>" + df['City'].astype(str)
+
+
+def port_points(df):
+    # One map point per charging port (the CSV is one row per unit)
+    return df.assign(popup=_address_popup(df))
+
+
+def station_points(df):
+    # One map point per site; it appears in each level's layer where it has at least one port
+    stations = aggregate_stations(df)
+    stations['L2_port'] = (stations['L2_ports'] > 0).astype('int8')
+    stations['L3_port'] = (stations['L3_ports'] > 0).astype('int8')
+    stations['popup'] = (
+        _address_popup(stations)
+        + "<br>Level 2 ports: " + stations['L2_ports'].astype(str)
+        + "<br>Level 3 ports: " + stations['L3_ports'].astype(str)
+        + "<br>Networks: " + stations['Networks']
+    )
+    return stations
+
+
+def bulk_port_rows(df, level):
+    # [[lat, lon, popup], ...] for the points of one level, built column-wise
+    points = df[df[level] == 1]
+    return list(zip(points['Latitude'].round(5).tolist(), points['Longitude'].round(5).tolist(),
+                    points['popup'].tolist()))
+
+
+def add_bulk_port_layers(df, ev_map):
+    FastMarkerCluster(
+        bulk_port_rows(df, 'L2_port'), name='Level 2 Charging',
+        callback=BULK_MARKER_CALLBACK % {'color': 'green', 'icon': 'flash'},
+    ).add_to(ev_map)
+    FastMarkerCluster(
+        bulk_port_rows(df, 'L3_port'), name='Level 3 Charging',
+        callback=BULK_MARKER_CALLBACK % {'color': 'red', 'icon': 'bolt'},
+    ).add_to(ev_map)
+
+
+# --- Pre-tiled station chunks for the lazy map shell (app/map_shell.py) ---
+TILE_ZOOM = 10  # ~40 km web-mercator tiles at Canadian latitudes
+
+
+def export_province_tiles(df, province_code, tiles_dir=TILES_DIR, by_station=False, tile_zoom=TILE_ZOOM,
+                          offsets=None):
+    """
+    Writes {tiles_dir}/{code}/{level}/{z}/{x}/{y}.json chunks of [lat, lon, popup] rows plus an
+    index.json with the province center/bounds and a count and centroid per non-empty tile.
+    Returns False when the province has no located ports.
+    """
+    if offsets is None:
+        offsets = province_offsets(df)
+    df = province_rows(df, province_code, offsets).dropna(subset=['Latitude', 'Longitude'])
+    if df.empty:
+        return False
+    points = station_points(df) if by_station else port_points(df)
+
+    province_dir = os.path.join(tiles_dir, province_code)
+    shutil.rmtree(province_dir, ignore_errors=True)
+
+    index = {
+        'center': [float(points['Latitude'].mean()), float(points['Longitude'].mean())],
+        'bounds': [[float(points['Latitude'].min()), float(points['Longitude'].min())],
+                   [float(points['Latitude'].max()), float(points['Longitude'].max())]],
+        'tile_zoom': tile_zoom,
+        'levels': {},
+    }
+    for level in ['L2_port', 'L3_port']:
+        level_points = points[points[level] == 1]
+        tile_x, tile_y = tile_coordinates(level_points['Latitude'], level_points['Longitude'], tile_zoom)
+        tiles = {}
+        for (x, y), tile in level_points.groupby([tile_x, tile_y], sort=True):
+            tile_dir = os.path.join(province_dir, level, str(tile_zoom), str(x))
+            os.makedirs(tile_dir, exist_ok=True)
+            with open(os.path.join(tile_dir, f"{y}.json"), "w", encoding="utf-8") as f:
+                json.dump(bulk_port_rows(tile, level), f, separators=(",", ":"))
+            tiles[f"{x}/{y}"] = {
+                'count': len(tile),
+                'lat': round(float(tile['Latitude'].mean()), 5),
+                'lon': round(float(tile['Longitude'].mean()), 5),
+            }
+        index['levels'][level] = {'tiles': tiles}
+
+    os.makedirs(province_dir, exist_ok=True)
+    with open(os.path.join(province_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return True
+
+
+def _check_element_internals(element):
+    # stabilize_element_ids rewrites branca's private _id/_children (tested with the folium pinned in
+    # requirements.txt); fail loudly if an upgrade changes them instead of writing random ids again
+    if not isinstance(getattr(element, "_id", None), str) or not isinstance(getattr(element, "_children", None), dict):
+        raise RuntimeError(f"{type(element).__name__} has no string _id / dict _children; this branca/folium "
+                           "version is not supported by stabilize_element_ids")
+    if not element.get_name().endswith(element._id):
+        raise RuntimeError(f"{type(element).__name__}.get_name() no longer derives from _id; this branca/folium "
+                           "version is not supported by stabilize_element_ids")
+
+
+def stabilize_element_ids(map_obj, seed):
+    """
+    Replaces folium's random element ids with ids derived from seed and tree position,
+    so the same data always renders to the same bytes (serial or parallel). Raises
+    RuntimeError when folium's element internals no longer match what it rewrites.
+    """
+    seen = set()
+    counter = 0
+
+    def visit(element):
+        nonlocal counter
+        if id(element) in seen:
+            return
+        seen.add(id(element))
+
+        _check_element_internals(element)
+        element._id = hashlib.md5(f"{seed}-{counter}".encode()).hexdigest()
+        counter += 1
+
+        # Children are keyed by their generated name unless added under an explicit one
+        children = list(element._children.items())
+        element._children.clear()
+        for key, child in children:
+            child_name = child.get_name()
+            visit(child)
+            element._children[child.get_name() if key == child_name else key] = child
+
+        # Popups keep their header/html/script containers as attributes, not children
+        for value in list(vars(element).values()):
+            if isinstance(value, Element):
+                visit(value)
+
+    visit(map_obj.get_root())
+    return map_obj
+
+
+# --- Precompressed artifacts + manifest (served by app/static_server.py) ---
+def _compressors():
+    compressors = {"gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        compressors["br"] = (".br", lambda data: brotli.compress(data, quality=11))
+    return compressors
+
+
+def write_map_artifacts(html_bytes, path, previous=None):
+    """
+    Writes path plus its .gz (and .br when brotli is installed) siblings and returns the manifest
+    entry. When the content hash matches the previous entry and every variant is on disk, nothing
+    is rewritten or recompressed. Returns (entry, changed).
+    """
+    digest = hashlib.sha256(html_bytes).hexdigest()
+    name = os.path.basename(path)
+    compressors = _compressors()
+    if (previous and previous.get("sha256") == digest and os.path.exists(path)
+            and all(os.path.exists(path + suffix) for suffix, _ in compressors.values())
+            and set(compressors) <= set(previous.get("variants", {}))):
+        return previous, False
+
+    with open(path, "wb") as f:
+        f.write(html_bytes)
+    entry = {"file": name, "sha256": digest, "bytes": len(html_bytes), "variants": {}}
+    for encoding, (suffix, compress) in compressors.items():
+        compressed = compress(html_bytes)
+        with open(path + suffix, "wb") as f:
+            f.write(compressed)
+        entry["variants"][encoding] = {"file": name + suffix, "bytes": len(compressed)}
+    return entry, True
+
+
+def write_manifest(output_dir, manifest):
+    tmp_path = os.path.join(output_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_FILE))
+
+
+def save_province_map(df, province_code, output_dir, render="markers", by_station=False, tiles_dir=None,
+                      previous=None):
+    """
+    Builds and writes one province (and its tiles when tiles_dir is set).
+    Returns (province, seconds, manifest entry or None when there is no data, changed?).
+    """
+    start = time.perf_counter()
+    offsets = province_offsets(df)  # df is usually already one province's slice: one short scan
+    map_obj = plot_charging_map_by_province(df, province_code, render, by_station, offsets)
+    entry, changed = None, False
+    if map_obj:
+        stabilize_element_ids(map_obj, province_code)
+        # Same bytes folium's Map.save would write
+        html_bytes = map_obj.get_root().render().encode("utf8")
+        entry, changed = write_map_artifacts(html_bytes, os.path.join(output_dir, f"{province_code}_map.html"), previous)
+    if tiles_dir:
+        export_province_tiles(df, province_code, tiles_dir, by_station, offsets=offsets)
+    return province_code, time.perf_counter() - start, entry, changed
+
+
+def _report(province_code, seconds, entry, changed):
+    if entry is None:
+        print(f"  Skipped {province_code} (no data).")
+    elif not changed:
+        print(f"Map for {province_code} unchanged ({seconds:.2f}s), kept existing artifacts")
+    else:
+        sizes = ", ".join(f"{enc} {v['bytes'] / 1024:.0f} KB" for enc, v in entry["variants"].items())
+        print(f"Generated map for {province_code} in {seconds:.2f}s ({entry['bytes'] / 1024:.0f} KB; {sizes})")
+
+
+def remove_province_artifacts(province_code, output_dir, manifest, tiles_dir=None):
+    # Deletes a province's map, its compressed variants and tiles, and drops its manifest entry
+    entry = manifest.pop(province_code, None) or {}
+    html_name = entry.get("file", f"{province_code}_map.html")
+    names = {html_name, html_name + ".gz", html_name + ".br"} | {v["file"] for v in entry.get("variants", {}).values()}
+    for name in names:
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(os.path.join(tiles_dir or TILES_DIR, province_code), ignore_errors=True)
+
+
+# --- Per-province data fingerprints (incremental rebuilds) ---
+FINGERPRINT_FILE = "fingerprints.json"
+FINGERPRINT_VERSION = 1  # bump when map rendering changes so every province is rebuilt once
+FINGERPRINT_COLUMNS = ['Station Name', 'Street Address', 'City', 'Latitude', 'Longitude', 'EV Network',
+                       'L2_port', 'L3_port']
+
+
+def compute_province_fingerprints(charging_ports_df, options):
+    """
+    Hashes every processed row once (vectorized), combines row hashes per station and station
+    hashes per province. Returns {province: {"fingerprint": hex, "stations": {station_key: hex}}}.
+    options (render mode etc.) is folded into each province fingerprint.
+    """
+    df = charging_ports_df.dropna(subset=['State'])
+    row_hash = pd.util.hash_pandas_object(df[FINGERPRINT_COLUMNS], index=False).to_numpy()
+    rows = pd.DataFrame({'State': df['State'].astype(str).to_numpy(),
+                         'station_key': station_keys(df).to_numpy(),
+                         'hash': row_hash})
+    # Sum wraps modulo 2**64: order-insensitive, but still sensitive to added/removed duplicate ports
+    station_hashes = rows.groupby(['State', 'station_key'], sort=True)['hash'].sum()
+
+    option_text = json.dumps({"version": FINGERPRINT_VERSION, **options}, sort_keys=True)
+    fingerprints = {}
+    for province, hashes in station_hashes.groupby(level='State', sort=True):
+        stations = {key: f"{value:016x}" for (_, key), value in hashes.items()}
+        digest = hashlib.sha256(option_text.encode())
+        for key, value in stations.items():
+            digest.update(f"{key}:{value}\n".encode())
+        fingerprints[province] = {"fingerprint": digest.hexdigest(), "stations": stations}
+    return fingerprints
+
+
+def diff_stations(previous, current):
+    # (added, removed, changed) station counts between two {station_key: hash} dicts
+    previous, current = previous or {}, current or {}
+    added = len(current.keys() - previous.keys())
+    removed = len(previous.keys() - current.keys())
+    changed = sum(1 for key in current.keys() & previous.keys() if current[key] != previous[key])
+    return added, removed, changed
+
+
+def load_fingerprints(output_dir):
+    fingerprint_file = os.path.join(output_dir, FINGERPRINT_FILE)
+    if not os.path.exists(fingerprint_file):
+        return {}
+    with open(fingerprint_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_fingerprints(output_dir, fingerprints):
+    tmp_path = os.path.join(output_dir, FINGERPRINT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, os.path.join(output_dir, FINGERPRINT_FILE))
 
 
 # --- Save All Maps ---
-def export_all_province_maps(charging_ports_df, output_dir="maps"):
+def export_all_province_maps(charging_ports_df, output_dir="maps", workers=1, render="markers", by_station=False,
+                             tiles_dir=None, incremental=False):
+    """
+    Writes maps/{code}_map.html for every province, plus the lazy-loading tile chunks when tiles_dir
+    is set. Each province is handed over as a row-range slice of the province-sorted frame; with
+    workers > 1 each slice is rendered in its own process. With incremental=True, provinces whose
+    data fingerprint matches the one stored in maps/fingerprints.json are not rebuilt. Provinces no
+    longer in the data lose their map files, manifest entry and tiles.
+    """
     os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+
+    previous_fingerprints = load_fingerprints(output_dir)
+    fingerprints = compute_province_fingerprints(charging_ports_df, {"render": render, "by_station": by_station})
+    for prov in sorted(previous_fingerprints.keys() | fingerprints.keys()):
+        added, removed, changed = diff_stations(previous_fingerprints.get(prov, {}).get("stations"),
+                                                fingerprints.get(prov, {}).get("stations"))
+        print(f"{prov}: {added} stations added, {removed} removed, {changed} changed")
+
+    def is_current(prov):
+        return (prov in manifest and prov in previous_fingerprints
+                and previous_fingerprints[prov]["fingerprint"] == fingerprints[prov]["fingerprint"]
+                and os.path.exists(os.path.join(output_dir, manifest[prov]["file"]))
+                and (not tiles_dir or os.path.exists(os.path.join(tiles_dir, prov, "index.json"))))
 
-    provinces = sorted(charging_ports_df['State'].dropna().unique())
-    for prov in provinces:
-        print(f"Generating map for {prov}...")
-        map_obj = plot_charging_map_by_province(charging_ports_df, prov)
-        if map_obj:
-            map_obj.save(os.path.join(output_dir, f"{prov}_map.html"))
-        else:
-            print(f"  Skipped {prov} (no data).")
+    def record(result):
+        _report(*result)
+        province_code, _, entry, _ = result
+        if entry is not None:
+            manifest[province_code] = entry
+
+    # Provinces gone from the data: without this their old map, manifest entry and tiles stay served
+    for prov in sorted((previous_fingerprints.keys() | manifest.keys()) - fingerprints.keys()):
+        print(f"Removing map artifacts for {prov} (no longer in the data)")
+        remove_province_artifacts(prov, output_dir, manifest, tiles_dir)
+
+    offsets = province_offsets(charging_ports_df)
+    provinces = sorted(offsets)
+    if incremental:
+        skipped = [prov for prov in provinces if is_current(prov)]
+        for prov in skipped:
+            print(f"Map for {prov} up to date (same data fingerprint), not rebuilt")
+        provinces = [prov for prov in provinces if prov not in skipped]
+    start = time.perf_counter()
+    if workers <= 1:
+        for prov in provinces:
+            print(f"Generating map for {prov}...")
+            record(save_province_map(province_rows(charging_ports_df, prov, offsets), prov, output_dir, render, by_station, tiles_dir,
+                                     manifest.get(prov)))
+    else:
+        # Largest provinces first so they don't end up as the stragglers
+        provinces = sorted(provinces, key=lambda prov: offsets[prov][0] - offsets[prov][1])
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(save_province_map, province_rows(charging_ports_df, prov, offsets), prov, output_dir,
+                                   render, by_station, tiles_dir, manifest.get(prov))
+                       for prov in provinces]
+            for future in futures:
+                record(future.result())
+    write_manifest(output_dir, manifest)
+    write_fingerprints(output_dir, fingerprints)
+    print(f"Map export took {time.perf_counter() - start:.2f}s")
+
+
+def export_density_grid(charging_ports_df, source_path, path=DENSITY_GRID_FILE):
+    # National coverage grid (app/density_grid.py): every province, level and grid zoom in one array file
+    start = time.perf_counter()
+    grid = build_density_grid(charging_ports_df)
+    write_density_grid(grid, source_path, path)
+    print(f"Density grid: {len(grid['count']):,} cells written to {path} "
+          f"({os.path.getsize(path) / 1024:.0f} KB) in {time.perf_counter() - start:.2f}s")
 
 
 # --- Run It ---
+def main():
+    parser = argparse.ArgumentParser(description="Build the processed station cache and the per-province maps.")
+    parser.add_argument("--input", default=None,
+                        help="NREL alt-fuel-stations CSV (default: newest alt_fuel_stations_ev_charging_units*.csv)")
+    parser.add_argument("--output-dir", default="maps", help="Folder for the province map HTML files")
+    parser.add_argument("--cache", default=PROCESSED_CACHE_FILE, help="Columnar cache file read by the app")
+    parser.add_argument("--skip-maps", action="store_true", help="Only rebuild the columnar cache")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to render province maps (1 = serial)")
+    parser.add_argument("--render", choices=RENDER_MODES, default="markers",
+                        help="'markers': one folium.Marker per point; 'bulk': client-side FastMarkerCluster layers")
+    parser.add_argument("--by-station", action="store_true",
+                        help="One map point per station (with L2/L3 port counts) instead of one per port")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild provinces whose data fingerprint changed since the last export")
+    parser.add_argument("--tiles", nargs="?", const=TILES_DIR, default=None, metavar="DIR",
+                        help=f"Also write viewport tiles for the lazy map shell (default DIR: {TILES_DIR})")
+    parser.add_argument("--density-grid", nargs="?", const=DENSITY_GRID_FILE, default=None, metavar="PATH",
+                        help=f"Also write the per-province coverage grid (default PATH: {DENSITY_GRID_FILE})")
+    args = parser.parse_args()
+
+    input_file = args.input or latest_stations_csv()
+    charging_ports = compact_charging_ports(process_charging_ports_data(input_file))
+
+    write_processed_cache(charging_ports, input_file, args.cache)
+    print(f"✅ Processed station cache written to {args.cache}.")
+
+    if args.density_grid:
+        export_density_grid(charging_ports, input_file, args.density_grid)
+
+    if not args.skip_maps:
+        export_all_province_maps(charging_ports, args.output_dir, workers=args.workers, render=args.render,
+                                 by_station=args.by_station, tiles_dir=args.tiles, incremental=args.incremental)
+        print("✅ All province maps generated.")
+
+
 if __name__ == "__main__":
-    input_file = "alt_fuel_stations_ev_charging_units (May 19 2025).csv"  # Or whatever the monthly name is
-    charging_ports = process_charging_ports_data(input_file)
-    export_all_province_maps(charging_ports)
-    print("✅ All province maps generated.")
+    main()
@@ -1,9 +1,23 @@
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import folium
-from folium.plugins import MarkerCluster, LocateControl
-from streamlit_folium import st_folium
+import hmac
+import os
+import time
+
+from charging_data import (
+    load_processed_charging_ports, latest_stations_csv, source_signature, province_map, province_offsets, province_rows,
+)
+from province_cube import build_province_cube
+from chart_specs import chart_spec
+from map_shell import load_tile_index, render_map_shell
+from file_cache import FileContentCache
+from static_server import load_manifest, start_static_server, versioned_path
+from telemetry import Telemetry, make_sink
+from profiling import StageTimings, current_rss
+from pricing import compile_pricing_store, pricing_source_files
+
+# Copy-on-write: derived frames never write back into the shared cached dataset
+pd.set_option("mode.copy_on_write", True)
 
 # Set the page config with a custom title, favicon, and hide the Streamlit menu
 st.set_page_config(
@@ -20,22 +34,38 @@ st.set_page_config(
 
 import uuid
 from datetime import datetime
-from opencensus.ext.azure.log_exporter import AzureLogHandler
-import logging
 
 # Replace with your Azure Application Insights Connection String
 CONNECTION_STRING = "InstrumentationKey=4c91cae0-735c-4d2e-bf0c-01782744234f;IngestionEndpoint=https://canadacentral-1.in.applicationinsights.azure.com/;LiveEndpoint=https://canadacentral.livediagnostics.monitor.azure.com/;ApplicationId=6e461640-80ec-46f6-86d3-1456c03c1b35"
 
-## Set up logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-logger.addHandler(AzureLogHandler(connection_string=CONNECTION_STRING))
+## Set up telemetry
+# "azure" (default), "stdout", "file:<path>" or "off"; stdout/file sinks let you check events offline
+TELEMETRY_SINK = os.environ.get("CHARGECOMPARE_TELEMETRY", "azure")
+
+@st.cache_resource
+def get_telemetry():
+    # One queue, batcher thread and exporter per process, however many sessions and reruns there are
+    return Telemetry(make_sink(TELEMETRY_SINK, CONNECTION_STRING))
+
+## Per-stage timings of each rerun, kept per process in a rolling window
+# The sidebar panel shows for ?admin=<token> when CHARGECOMPARE_ADMIN_TOKEN is set; CHARGECOMPARE_TIMINGS_FILE,
+# when set, gets the same JSON summary rewritten after every rerun
+ADMIN_TOKEN = os.environ.get("CHARGECOMPARE_ADMIN_TOKEN")
+TIMINGS_FILE = os.environ.get("CHARGECOMPARE_TIMINGS_FILE")
+
+@st.cache_resource
+def get_stage_timings():
+    return StageTimings(window=500)
+
+timings = get_stage_timings()
+rerun_started, rerun_rss = time.perf_counter(), current_rss()
 
 # Track unique sessions
 if "session_id" not in st.session_state:
     st.session_state["session_id"] = str(uuid.uuid4())  # Generate a unique session ID
     session_start_time = datetime.now().isoformat()
-    logger.info(f"New user session: {st.session_state['session_id']} at {session_start_time}")
+    get_telemetry().emit("session_start", f"New user session: {st.session_state['session_id']} at {session_start_time}",
+                         session_id=st.session_state["session_id"])
 
 
 # Main page title
@@ -82,143 +112,122 @@ For current pricing, please consult the charging network’s app.
 #charging_ports = pd.read_csv("alt_fuel_stations_ev_charging_units (May 19 2025).csv")
 
 
-# Define the function to process the charging ports dataset
-def process_charging_ports_data(file_path):
-    charging_ports = pd.read_csv(file_path)
-    
-    # Initialize columns
-    charging_ports["ports"] = 1
-
-    # Tesla Level 2
-    charging_ports['L2_Tesla'] = charging_ports['EV Network'].apply(lambda x: 1 if 'Tesla Destination' in str(x) else 0)
-    charging_ports['L2_Tesla'] = charging_ports.apply(
-        lambda row: 0 if row.get('EV J1772 Connector Count', 0) == 1 and row['L2_Tesla'] == 1 else row['L2_Tesla'],
-        axis=1
-    )
-
-    # Tesla Level 3
-    charging_ports['L3_Tesla'] = charging_ports.apply(
-        lambda row: 1 if row.get('EV J3400 Connector Count', 0) == 1 and row['L2_Tesla'] == 0 else 0,
-        axis=1
-    )
-
-    # DCFC and dual connector adjustment
-    DCFC_ports = charging_ports[charging_ports["EV DC Fast Count"] > 0]
-    filtered_df = DCFC_ports[(DCFC_ports['EV CHAdeMO Connector Count'] == 1) & (DCFC_ports['EV CCS Connector Count'] == 1)]
-
-    # Update dual connector adjustment
-    filtered_df.loc[:, 'EV CHAdeMO Connector Count'] = 0
-    filtered_df.loc[:, 'EV CCS Connector Count'] = 0
-    filtered_df.loc[:, 'ChademoCCSsingleuseport'] = 1
-
-    # Apply updates to original DataFrame
-    charging_ports.loc[filtered_df.index, ['EV CHAdeMO Connector Count', 'EV CCS Connector Count']] = filtered_df[['EV CHAdeMO Connector Count', 'EV CCS Connector Count']]
-    charging_ports.loc[filtered_df.index, 'ChademoCCSsingleuseport'] = 1
-
-    # Create L2 and L3 port columns
-    charging_ports["L2_port"] = charging_ports.apply(
-        lambda row: 1 if row.get("EV J1772 Connector Count", 0) > 0 or row.get("L2_Tesla", 0) > 0 else 0,
-        axis=1
-    )
-    charging_ports["L3_port"] = charging_ports.apply(
-        lambda row: 1 if (
-            row.get("EV CCS Connector Count", 0) > 0 or
-            row.get("EV CHAdeMO Connector Count", 0) > 0 or
-            row.get("ChademoCCSsingleuseport", 0) > 0 or
-            row.get("L3_Tesla", 0) > 0
-        ) else 0,
-        axis=1
-    )
-    
-    # Define bucket mapping
-    network_bucket_map = {
-    # Centralized utility-backed
-    'BCHYDRO': 'Centralized Utility-Backed',
-    'Circuit électrique': 'Centralized Utility-Backed',
-    'IVY': 'Centralized Utility-Backed',
-    'eCharge Network': 'Centralized Utility-Backed',
-
-    # Centralized automaker-backed
-    'Tesla': 'Centralized Automaker-Backed',
-    'Tesla Destination': 'Centralized Automaker-Backed',
-    'Electrify Canada': 'Centralized Automaker-Backed',
-    'FORD_CHARGE': 'Centralized Automaker-Backed',
-
-    # Centralized fuel/retail-integrated
-    'PETROCAN': 'Centralized Fuel/Retail Integrated',
-    'SHELL_RECHARGE': 'Centralized Fuel/Retail Integrated',
-    'COUCHE_TARD': 'Centralized Fuel/Retail Integrated',
-    'ON_THE_RUN_EV': 'Centralized Fuel/Retail Integrated',
-    '7CHARGE': 'Centralized Fuel/Retail Integrated',
-    'CIRCLE_K': 'Centralized Fuel/Retail Integrated',
-
-    # Non-Centralized site-hosts
-    'AUTEL': 'Non-Centralized Site-Host',
-    'LAKELAND_EV': 'Non-Centralized Site-Host',
-    'ChargePoint Network': 'Non-Centralized Site-Host',
-    'FLO': 'Non-Centralized Site-Host',
-    'SWTCH': 'Non-Centralized Site-Host',
-    'CHARGELAB': 'Non-Centralized Site-Host',
-    'EV Connect': 'Non-Centralized Site-Host',
-    'OpConnect': 'Non-Centralized Site-Host',
-    'JULE': 'Non-Centralized Site-Host',
-    'NOODOE': 'Non-Centralized Site-Host',
-    'AMPUP': 'Non-Centralized Site-Host',
-    'TURNONGREEN': 'Non-Centralized Site-Host',
-    'EVBOLT': 'Non-Centralized Site-Host',
-    'Hwisel': 'Non-Centralized Site-Host',
-    'ZEFNET': 'Non-Centralized Site-Host',
-    'EVGATEWAY': 'Non-Centralized Site-Host',
-    'CHARGEUP': 'Non-Centralized Site-Host',
-    'RED_E': 'Non-Centralized Site-Host',
-    'HONEY_BADGER': 'Non-Centralized Site-Host',
-    'Sun Country Highway': 'Non-Centralized Site-Host',
-
-    # Fallback for unknown or missing
-    'Non-Networked': 'Non-Centralized Site-Host'
-    }
+# --- Load station data once per server process ---
+@st.cache_resource(max_entries=1, show_spinner="Loading charging station data...")
+def load_charging_ports(file_path, mtime_ns, size):
+    """
+    Reads the memory-mapped columnar cache (or parses and flags the NREL extract when the cache is stale).
+    Cached across all sessions and reruns; the mtime/size arguments are only part of the cache key,
+    so replacing the file triggers a reload.
+    """
+    with get_stage_timings().stage("load_charging_ports"):
+        return load_processed_charging_ports(file_path)
 
-    # Apply the bucket mapping
-    charging_ports['Operator_Bucket'] = charging_ports['EV Network'].map(network_bucket_map).fillna('Non-Networked')
-
-    # Mapping from 'EV Network' to standardized names
-    network_name_mapping = {
-    'Tesla': 'Tesla',
-    'Tesla Destination': 'Tesla',
-    'Electrify Canada': 'Electrify Canada',
-    'SHELL_RECHARGE': 'Shell Recharge',
-    'PETROCAN': 'Petro Canada',
-    'COUCHE_TARD': 'Couche Tard/CircleK',
-    'CIRCLE_K': 'Couche Tard/CircleK',
-    'ON_THE_RUN_EV': 'On The Run EV (Parkland)',
-    'BCHYDRO': 'BC Hydro',
-    'Circuit électrique': 'Electric Circuit (Hydro Quebec)',
-    'IVY': 'Ivy (OPG and Hydro One)',
-    'eCharge Network': 'eCharge (NB power)',
-    'FORD_CHARGE': 'Ford Blue Oval'
-    }
+stations_csv = latest_stations_csv()
+stations_key = source_signature(stations_csv) if os.path.exists(stations_csv) else (stations_csv, 0, 0)
+charging_ports = load_charging_ports(*stations_key)
 
-    # Apply mapping to create a new column
-    charging_ports['Clean_Network_Name'] = charging_ports['EV Network'].map(network_name_mapping)
+@st.cache_resource(max_entries=1)
+def load_province_offsets(file_path, mtime_ns, size):
+    # Row range of each province in the province-sorted table, found once per dataset version
+    return province_offsets(load_charging_ports(file_path, mtime_ns, size))
 
-    # Drop IVY stations outside Ontario
-    charging_ports = charging_ports[~((charging_ports['EV Network'] == 'IVY') & (charging_ports['State'] != 'ON'))]
+province_row_offsets = load_province_offsets(*stations_key)
 
 
-    return charging_ports
+@st.cache_resource(max_entries=1)
+def load_province_cube(file_path, mtime_ns, size):
+    # One group-by pass over the dataset; every per-province widget reads from this
+    charging_ports = load_charging_ports(file_path, mtime_ns, size)
+    with get_stage_timings().stage("build_province_cube"):
+        return build_province_cube(charging_ports)
 
-charging_ports = process_charging_ports_data("alt_fuel_stations_ev_charging_units (May 19 2025).csv")
+cube = load_province_cube(*stations_key)
 
 #charging_ports.to_csv('look.csv')
 
+PROVINCE_OPTIONS = [
+    "Alberta", "British Columbia", "Manitoba", "New Brunswick",
+    "Newfoundland and Labrador", "Nova Scotia", "Ontario",
+    "Prince Edward Island", "Quebec", "Saskatchewan"
+]
+
+
+# "matplotlib": server-rendered images (pre-rendered once per dataset version, shared by all sessions);
+# "client": small Vega-Lite JSON specs drawn in the browser, without importing matplotlib at all
+CHART_BACKEND = os.environ.get("CHARGECOMPARE_CHART_BACKEND", "matplotlib")
+CHART_FORMAT = os.environ.get("CHARGECOMPARE_CHART_FORMAT", "png")
+if CHART_FORMAT not in ("png", "svg"):
+    CHART_FORMAT = "png"
+
+@st.cache_resource(max_entries=1, show_spinner="Rendering charts...")
+def load_chart_images(file_path, mtime_ns, size, fmt):
+    # Batch pre-render at data-load time, keyed by dataset version: {(province, chart): image bytes}
+    from charts import prerender_charts
+
+    cube = load_province_cube(file_path, mtime_ns, size)
+    with get_stage_timings().stage("prerender_charts"):
+        return prerender_charts(cube, [province_map[name] for name in PROVINCE_OPTIONS], fmt)
+
+chart_images = load_chart_images(*stations_key, CHART_FORMAT) if CHART_BACKEND != "client" else {}
+
+@timings.timed()
+def show_chart(province_code, chart):
+    # Charts with nothing to draw (no ports of that level in the province) are None and show nothing
+    if CHART_BACKEND == "client":
+        spec = chart_spec(cube, province_code, chart)
+        if spec is not None:
+            st.vega_lite_chart(spec, use_container_width=True)
+        return
+
+    image = chart_images.get((province_code, chart))
+    if image is None:
+        return
+    # st.image takes SVG as markup text; column width matches what st.pyplot used
+    if CHART_FORMAT == "svg":
+        st.image(image.decode("utf-8"), use_column_width=True)
+    else:
+        st.image(image, use_column_width=True, output_format="PNG")
+
+# --- Load and process pricing data ---
+@st.cache_resource(max_entries=1)
+def load_pricing_store(*file_signatures):
+    # Compiled once per process (and again whenever one of the pricing CSVs changes)
+    with get_stage_timings().stage("compile_pricing_store"):
+        return compile_pricing_store()
+
+# --- Pre-rendered page blocks (summary boxes, operator texts, pricing legends and tables) ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_page_fragments(file_path, mtime_ns, size, pricing_key):
+    # HTML/markdown blocks of every province, rendered once per dataset and pricing version:
+    # {province code: fragments}; reruns only look strings up
+    from page_fragments import render_page_fragments
+
+    cube = load_province_cube(file_path, mtime_ns, size)
+    store = load_pricing_store(*pricing_key)
+    with get_stage_timings().stage("render_page_fragments"):
+        return render_page_fragments(cube, store, {province_map[name]: name for name in PROVINCE_OPTIONS})
+
+pricing_key = tuple(source_signature(path) for path in pricing_source_files())
+page_fragments = load_page_fragments(*stations_key, pricing_key)
+
+def show_fragment(html):
+    if html is not None:
+        st.markdown(html, unsafe_allow_html=True)
+
+@timings.timed()
+def show_pricing_section(section):
+    if section['legend']:
+        cols = st.columns(len(section['legend']))
+        for col, block in zip(cols, section['legend']):
+            with col:
+                st.markdown(block, unsafe_allow_html=True)
+    st.markdown(section['body'], unsafe_allow_html=True)
+
 # Province selector
 province_full_name = st.selectbox(
     "Select a province to view public EV charging information:",
-    [
-        "Alberta", "British Columbia", "Manitoba", "New Brunswick", 
-        "Newfoundland and Labrador", "Nova Scotia", "Ontario", 
-        "Prince Edward Island", "Quebec", "Saskatchewan"
-    ]
+    PROVINCE_OPTIONS
 )
 
 # Add this in your Streamlit app script
@@ -229,13 +238,6 @@ A **charging port** refers to an individual plug where one electric vehicle can
 Some stations may have multiple ports to serve more than one EV simultaneously.
 """)
 
-province_map = {
-    'Alberta': 'AB', 'British Columbia': 'BC', 'Manitoba': 'MB', 'New Brunswick': 'NB',
-    'Newfoundland and Labrador': 'NL', 'Nova Scotia': 'NS', 'Ontario': 'ON',
-    'Prince Edward Island': 'PE', 'Quebec': 'QC', 'Saskatchewan': 'SK',
-    'Yukon': 'YT', 'Northwest Territories': 'NT', 'Nunavut': 'NU'
-}
-
 province = province_map.get(province_full_name)
 
 # Optional subheading
@@ -244,52 +246,8 @@ st.markdown("Level 2 charging typically provides 7–19 kW of power and takes 4
         "Level 3 charging (DC Fast Charging) delivers 50–500 kW and can charge most EVs in under 1 hour.")
 
 
-# Function to generate the plot and description
-def plot_ports_by_province(charging_ports: pd.DataFrame, province):
-    # Filter data for the selected province
-    province_data = charging_ports[charging_ports["State"] == province]
-
-    # Sum Level 2 and Level 3 ports
-    port_counts = province_data[['L2_port', 'L3_port']].sum()
-
-    # Create bar plot
-    fig, ax = plt.subplots(figsize=(7, 5))
-    port_counts.plot(
-        kind='bar',
-        ax=ax,
-        color=['#015A06', '#999999']
-    )
-
-    # Add horizontal grid lines
-    ax.yaxis.grid(True, linestyle='--', alpha=0.7)
-
-    # Customize the plot
-    #ax.set_title(f'EV Charging Ports in {province}', fontsize=14, fontweight='bold')
-    ax.set_ylabel('Number of Ports', fontsize=12)
-    ax.set_xlabel('Power Level', fontsize=12)
-    ax.set_xticklabels(['Level 2', 'Level 3'], rotation=0, fontsize=12)
-    ax.tick_params(axis='y', labelsize=12)
-
-    return fig
-
-
-# --- Section: Province Summary Box ---
-def generate_station_summary(charging_ports, province_code):
-    df = charging_ports[charging_ports['State'] == province_code]
-    total_ports = len(df)
-    l2 = df['L2_port'].sum()
-    l3 = df['L3_port'].sum()
-
-    st.markdown(f"""
-    <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
-    <b>{province_full_name} Charging Ports Summary:</b><br>
-    🔌 Total charging ports: {total_ports:,}<br>
-    - Level 2 ports: {int(l2):,}<br>
-    - Level 3 ports: {int(l3):,}<br>
-    - Proportion of Level 2 (%): {l2 / total_ports * 100:.1f}%
-    </div>
-    """, unsafe_allow_html=True)
-
+# Pre-rendered blocks of the selected province
+fragments = page_fragments[province]
 
 #def plot_charging_map_by_province(df, province_code):
 #    df = df[df['State'] == province_code].dropna(subset=['Latitude', 'Longitude']).copy()
@@ -327,19 +285,111 @@ def generate_station_summary(charging_ports, province_code):
 
 import os
 
+# "html": inline maps/{code}_map.html; "tiles": lightweight shell that fetches viewport tiles from app/static/tiles;
+# "static": iframe pointing at the precompressed maps/ artifacts served by static_server.py
+MAP_SERVING_MODE = os.environ.get("CHARGECOMPARE_MAP_MODE", "html")
+MAP_CACHE_MAX_BYTES = int(os.environ.get("CHARGECOMPARE_MAP_CACHE_MB", "64")) * 1024 * 1024
+# The static server listens on loopback behind a reverse proxy; CHARGECOMPARE_STATIC_URL is the public
+# (HTTPS) URL the proxy exposes it at, as seen by the viewer's browser
+STATIC_SERVER_HOST = os.environ.get("CHARGECOMPARE_STATIC_HOST", "127.0.0.1")
+STATIC_SERVER_PORT = int(os.environ.get("CHARGECOMPARE_STATIC_PORT", "8502"))
+STATIC_SERVER_URL = os.environ.get("CHARGECOMPARE_STATIC_URL")
+if MAP_SERVING_MODE == "static" and not STATIC_SERVER_URL:
+    raise RuntimeError("CHARGECOMPARE_MAP_MODE=static needs CHARGECOMPARE_STATIC_URL, the public URL of the reverse "
+                       "proxy in front of the map server (a localhost default would point at each viewer's own machine)")
+
+@st.cache_resource
+def get_map_html_cache():
+    # One LRU of map HTML for the whole server process, shared by every session
+    return FileContentCache(max_bytes=MAP_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_static_server():
+    # Started once per process; shares the map LRU so compressed bytes are read from disk once
+    return start_static_server("maps", host=STATIC_SERVER_HOST, port=STATIC_SERVER_PORT, cache=get_map_html_cache())
+
+@timings.timed()
 def show_province_map(province_code):
     """
     Displays a pre-generated HTML map for a given province.
     Assumes maps are stored in a subfolder called 'maps' as 'QC_map.html', 'AB_map.html', etc.
+    In "tiles" mode the province is served through the lazy map shell when its tiles were exported.
     """
+    if MAP_SERVING_MODE == "tiles":
+        tile_index = load_tile_index(province_code)
+        if tile_index is not None:
+            st.components.v1.html(render_map_shell(province_code, tile_index), height=600)
+            return
+
+    if MAP_SERVING_MODE == "static":
+        entry = load_manifest("maps").get(province_code)
+        if entry is not None:
+            get_static_server()
+            st.components.v1.iframe(STATIC_SERVER_URL.rstrip("/") + versioned_path(entry), height=600, scrolling=True)
+            return
+
     map_file = os.path.join("maps", f"{province_code}_map.html")
-    if os.path.exists(map_file):
-        with open(map_file, "r", encoding="utf-8") as f:
-            map_html = f.read()
+    map_html = get_map_html_cache().read_text(map_file)
+    if map_html is not None:
         st.components.v1.html(map_html, height=600, scrolling=True)
     else:
         st.warning(f"Map for {province_code} not found. It may not have been generated yet.")
 
+@st.cache_resource(max_entries=1)
+def load_station_index(file_path, mtime_ns, size):
+    # Per dataset version; the KD-trees inside are built on the first query of each level/network filter
+    from spatial_index import StationIndex
+
+    return StationIndex(load_charging_ports(file_path, mtime_ns, size))
+
+NEAREST_LEVELS = {"Any level": None, "Level 2": "L2", "Level 3": "L3"}
+NEAREST_COLUMNS = ['Station Name', 'Street Address', 'City', 'EV Network', 'L2_port', 'L3_port']
+# Starting point when the province has no located stations (the centre the coverage map opens on)
+NEAREST_DEFAULT_POINT = (56.0, -96.0)
+
+@timings.timed()
+def show_nearest_ports(province_code):
+    # Server-side lookup of the closest ports to a point; defaults to the province's station centroid
+    stations = province_rows(charging_ports, province_code, province_row_offsets)
+    located = stations.dropna(subset=['Latitude', 'Longitude'])
+    default_lat, default_lon = ((float(located['Latitude'].mean()), float(located['Longitude'].mean()))
+                                if not located.empty else NEAREST_DEFAULT_POINT)
+    lat_col, lon_col, level_col, k_col = st.columns(4)
+    lat = lat_col.number_input("Latitude", -90.0, 90.0, default_lat, format="%.4f",
+                               key=f"nearest_lat_{province_code}")
+    lon = lon_col.number_input("Longitude", -180.0, 180.0, default_lon, format="%.4f",
+                               key=f"nearest_lon_{province_code}")
+    level = level_col.selectbox("Port level", list(NEAREST_LEVELS), index=2)
+    k = k_col.number_input("Ports", 1, 50, 5)
+
+    station_index = load_station_index(*stations_key)
+    rows, distances_km = station_index.nearest(lat, lon, k=k, level=NEAREST_LEVELS[level])
+    st.dataframe(station_index.frame(rows, distances_km.round(1), NEAREST_COLUMNS), hide_index=True)
+
+@st.cache_resource(max_entries=1)
+def load_coverage_grid(file_path, mtime_ns, size):
+    # The exported density grid when it was built from this stations file, otherwise built here once
+    from density_grid import build_density_grid, load_density_grid
+
+    grid = load_density_grid(file_path)
+    if grid is None:
+        with get_stage_timings().stage("build_density_grid"):
+            grid = build_density_grid(load_charging_ports(file_path, mtime_ns, size))
+    return grid
+
+@st.cache_resource(max_entries=64)
+def coverage_map_html(province_code, level, file_path, mtime_ns, size):
+    from density_grid import render_density_map
+
+    return render_density_map(load_coverage_grid(file_path, mtime_ns, size), province_code, level)
+
+COVERAGE_LEVELS = {"All ports": "ports", "Level 2": "L2_port", "Level 3": "L3_port"}
+
+@timings.timed()
+def show_coverage_map(province_code):
+    level = st.radio("Ports counted", list(COVERAGE_LEVELS), horizontal=True, key="coverage_level")
+    st.components.v1.html(coverage_map_html(province_code, COVERAGE_LEVELS[level], *stations_key), height=500)
+
 # Create tabs
 tab1, tab2 = st.tabs(["📊 Number of L2 versus L3 ports", "📍 Locate stations around you"])
 
@@ -348,17 +398,22 @@ with tab1:
     st.subheader("Public Charging Port Breakdown by Power Level")
 
     # Plot the bar chart
-    fig = plot_ports_by_province(charging_ports, province)
-    st.pyplot(fig)
+    show_chart(province, "ports")
 
     # Display province summary
-    generate_station_summary(charging_ports, province)
+    st.markdown(fragments['summary'], unsafe_allow_html=True)
 
 # --- Tab 2: Interactive Charging Station Map ---
 with tab2:
     st.subheader("Explore the Public Charging Stations in Your Province")
     show_province_map(province)
 
+    with st.expander("Find the nearest charging ports to a location"):
+        show_nearest_ports(province)
+
+    with st.expander("Coverage overview: charging port density by area"):
+        show_coverage_map(province)
+
     #charging_map = plot_charging_map_by_province(charging_ports, province)
     #st_data = st_folium(charging_map, width=700, height=500)
 
@@ -370,157 +425,17 @@ st.subheader(f"Key Station Operators in {province_full_name}")
 
 
 
-# Descriptions for each operator bucket
-bucket_descriptions = {
-    "Centralized Utility-Backed": "Operated by or in partnership with utilities, offering slow and/or fast charging.",
-    "Centralized Automaker-Backed": "Backed by automakers, focused on slow and/or fast charging along travel corridors.",
-    "Centralized Fuel/Retail Integrated": "Installed at major fuel stations or retail sites to serve customers on the go, primarly offerring Level 3 fast charging.",
-    "Non-Centralized Site-Host": "Owned by individual businesses (e.g., restaurants, hotels) or municipalities that use hardware and software platforms like FLO or ChargePoint. Pricing and service are typically managed locally."
-}
-
-def generate_province_bucket_text(charging_ports: pd.DataFrame, province_code: str) -> str:
-    # Filter data to selected province
-    df = charging_ports[charging_ports['State'] == province_code]
-
-    # Get available buckets and associated networks in this province
-    available_buckets = df.groupby('Operator_Bucket')['EV Network'].unique().to_dict()
-
-    # Compose text
-    text_output = []
-    for bucket, networks in available_buckets.items():
-        if bucket in bucket_descriptions:
-            networks_list = sorted(set(networks))
-            description = f"**{bucket}**: {bucket_descriptions[bucket]} In {province_full_name}, this includes: {', '.join(networks_list)}."
-            text_output.append(description)
-
-    return "\n\n".join(text_output)
-
-
 # Display the explanatory text for that province's operator buckets
-description_text = generate_province_bucket_text(charging_ports, province)
-st.markdown(description_text)
-
-import matplotlib.ticker as mtick
-
-def plot_operator_type_distribution_by_province(charging_ports, province_code, level):
-    # level = 'L2_port' or 'L3_port'
-    df = charging_ports.copy()
- 
-    # Filter to selected province and charging level
-    df = df[(df['State'] == province_code) & (df[level] == 1)]
-
-    bucket_counts = df.groupby('Operator_Bucket').size().reset_index(name='Count')
-    bucket_counts['Proportion'] = bucket_counts['Count'] / bucket_counts['Count'].sum()
-
-    ordered_buckets = [
-    'Centralized Fuel/Retail Integrated',
-    'Centralized Automaker-Backed',
-    'Centralized Utility-Backed',
-    'Non-Centralized Site-Host']
-
-    bucket_counts['Operator_Bucket'] = pd.Categorical(bucket_counts['Operator_Bucket'], categories=ordered_buckets, ordered=True)
-    bucket_counts = bucket_counts.sort_values('Operator_Bucket').dropna(subset=['Operator_Bucket'])
-
-    colors = [
-    '#E1B97C',  # Centralized Fuel/Retail Integrated – soft amber
-    '#C08D87',  # Centralized Automaker-Backed – clay rose
-    '#4A6484',  # Centralized Utility-Backed – steel blue
-    '#6C8C78']   # Non-Centralized Site-Host – muted green]
-
-
-    fig, ax = plt.subplots(figsize=(8, 5))
-    #bucket_counts.plot(kind='bar', x='Operator_Bucket', y='Proportion', legend=False, color=colors[:len(bucket_counts)], ax=ax)
-    
-    # Define color map based on fixed category-color mapping
-    color_map = {
-        'Centralized Fuel/Retail Integrated': '#E1B97C',
-        'Centralized Automaker-Backed': '#C08D87',
-        'Centralized Utility-Backed': '#4A6484',
-        'Non-Centralized Site-Host': '#6C8C78'
-    }
-
-    bucket_counts['Color'] = bucket_counts['Operator_Bucket'].map(color_map)
-    bucket_counts.plot(kind='bar', x='Operator_Bucket', y='Proportion', legend=False, color=bucket_counts['Color'], ax=ax)
-
-
-    # Format y-axis as %
-    ax.yaxis.set_major_formatter(mtick.PercentFormatter(xmax=1.0, decimals=0))
-
-    # Add % labels on bars (placed inside the bar for reliability with ylim=0..1)
-    for patch in ax.patches:
-        height = patch.get_height()
-        if height > 0:  # avoid divide-by-zero/labels on empty bars
-            x = patch.get_x() + patch.get_width() / 2
-            y = height / 2
-            # Pick label color based on bar fill height for readability
-            label_color = 'white' if height >= 0.12 else 'black'
-            ax.text(
-                x, y,
-                f"{height * 100:.0f}%",
-                ha='center', va='center',
-                fontsize=11, fontweight='bold',
-                color=label_color
-            )
-
-    ax.set_ylabel('Proportion of Charging Ports', fontsize=12)
-    ax.set_xlabel('Operator Type', fontsize=12)
-    #ax.set_title(f'{level.replace("_", " ")} Operator Types in {province_code}', fontsize=14, fontweight='bold')
-    ax.set_ylim(0, 1)
-    ax.tick_params(axis='x', labelrotation=30)
-    plt.tight_layout()
-    return fig
-
-
-def generate_operator_type_interpretation(charging_ports: pd.DataFrame, province: str, level: str) -> str:
-    # level = 'L2_port' or 'L3_port'
-
-
-    centralized_types = [
-        'Centralized Fuel/Retail Integrated',
-        'Centralized Automaker-Backed',
-        'Centralized Utility-Backed'
-    ]
-    non_centralized_types = ['Non-Centralized Site-Host', 'Non-Networked']
-
-    df = charging_ports[(charging_ports['State'] == province) & (charging_ports[level] == 1)].copy()
-    bucket_summary = df['Operator_Bucket'].value_counts(normalize=True)
-
-    if bucket_summary.empty:
-        return f"No {level.replace('_', ' ')} data available for {province}."
-
-    dominant_type = bucket_summary.idxmax()
-    dominant_percent = round(bucket_summary.max() * 100)
-    centralized_share = round(bucket_summary[bucket_summary.index.isin(centralized_types)].sum() * 100)
-    non_centralized_share = round(bucket_summary[bucket_summary.index.isin(non_centralized_types)].sum() * 100)
-
-    # Extract level prefix (e.g., "L2" or "L3")
-    level_prefix = level.split('_')[0]
-
-    insights_html = f"""
-    <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
-    <b>Operator Insights for {province_full_name} — {level_prefix} Ports:</b><br>
-    - Most common operator type: <b>{dominant_type}</b> ({dominant_percent}% of {level_prefix} ports)<br>
-    - <b>{centralized_share}%</b> are managed by centralized networks with consistent pricing and maintenance<br>
-    - <b>{non_centralized_share}%</b> are non-centralized (owned and priced independently by site hosts)
-    </div>
-    """
-
-    st.markdown(insights_html, unsafe_allow_html=True)
-
-
-# Level 2
-fig_l2 = plot_operator_type_distribution_by_province(charging_ports, province, "L2_port")
-# Level 3
-fig_l3 = plot_operator_type_distribution_by_province(charging_ports, province, "L3_port")
+st.markdown(fragments['bucket_text'])
 
 tab1, tab2 = st.tabs(["🔌 Level 2 Overview", "⚡ Level 3 Overview"])
 with tab1:
-    st.pyplot(fig_l2)
-    generate_operator_type_interpretation(charging_ports, province, "L2_port")
+    show_chart(province, "L2_port")
+    show_fragment(fragments['insights']['L2_port'])
 
 with tab2:
-    st.pyplot(fig_l3)
-    generate_operator_type_interpretation(charging_ports, province, "L3_port")
+    show_chart(province, "L3_port")
+    show_fragment(fragments['insights']['L3_port'])
 
 
 
@@ -580,198 +495,53 @@ st.markdown("The following table summarizes the **pricing characteristics** of m
 "\n\n This table does not include **non-centralized site-hosts** that use EVSE provider hardware/software (e.g., FLO, ChargePoint) but set their own pricing. The EVSE providers provide recommended pricing ranges, but site hosts can set their own rates within those ranges." \
 "\n\nFLO and ChargePoint are the most common EVSE providers in Canada. ")
 
-# --- Load and process pricing data ---
-charging_network_data = pd.read_csv("Pricing_data_networks.csv", encoding='ISO-8859-1')
-
-# --- Standardization and Styling Maps ---
-standardized_bucket_map = {
-    'Tesla': 'Centralized Automaker-Backed',
-    'Electrify Canada': 'Centralized Automaker-Backed',
-    'Ford Blue Oval': 'Centralized Automaker-Backed',
-    'Shell Recharge': 'Centralized Fuel/Retail Integrated',
-    'Petro Canada': 'Centralized Fuel/Retail Integrated',
-    'Couche Tard/CircleK': 'Centralized Fuel/Retail Integrated',
-    'On The Run EV (Parkland)': 'Centralized Fuel/Retail Integrated',
-    'BC Hydro': 'Centralized Utility-Backed',
-    'Electric Circuit (Hydro Quebec)': 'Centralized Utility-Backed',
-    'Ivy (OPG and Hydro One)': 'Centralized Utility-Backed',
-    'eCharge (NB power)': 'Centralized Utility-Backed',
-}
-bucket_colors = {
-    'Centralized Fuel/Retail Integrated': 'background-color: #E1B97C',
-    'Centralized Automaker-Backed': 'background-color: #C08D87',
-    'Non-Centralized Site-Host': 'background-color: #6C8C78',
-    'Centralized Utility-Backed': 'background-color: #9BBBE6',
-    'Non-Networked': 'background-color: #A0A9AB',
-}
-legend_labels = {
-    'Centralized Fuel/Retail Integrated': '🟨 Centralized Fuel/Retail Integrated',
-    'Centralized Automaker-Backed': '🟫 Centralized Automaker-Backed',
-    'Centralized Utility-Backed': '🟦 Centralized Utility-Backed',
-    'Non-Centralized Site-Host': '🟩 Non-Centralized Site-Host',
-    'Non-Networked': '⬜️ Non-Networked'
-}
-
-def highlight_by_bucket(row):
-    bucket = standardized_bucket_map.get(row['Network'], 'Non-Networked')
-    return [bucket_colors.get(bucket, '')] * len(row)
-
-# --- Utility functions ---
-def get_active_networks_by_province_and_level(province_acronym, charging_ports, level_column):
-    df = charging_ports[(charging_ports['State'] == province_acronym) & (charging_ports[level_column] == 1)]
-    return df['Clean_Network_Name'].dropna().unique().tolist()
-
-def get_filtered_table_by_level(province_acronym, charging_network_data, level):
-    level_column = 'L2_port' if level == 'L2' else 'L3_port'
-    active_networks = get_active_networks_by_province_and_level(province_acronym, charging_ports, level_column)
-    filtered = charging_network_data[
-        (charging_network_data['Network'].isin(active_networks)) &
-        (charging_network_data['Charging station level'] == level)
-    ].copy()
-
-    # Apply overrides for Tesla
-    if 'Tesla' in filtered['Network'].values:
-        if province_acronym in ['NB', 'PE']: #NS not sure
-            filtered.loc[filtered['Network'] == 'Tesla', 'kWh Based Pricing'] = 'No'
-            filtered.loc[filtered['Network'] == 'Tesla', 'Time Based Pricing'] = 'Yes'
-            filtered.loc[filtered['Network'] == 'Tesla', 'Tiered Pricing for L3'] = 'Yes'
-
-            filtered.loc[filtered['Network'] == 'Tesla', 'Pricing Approach'] = 'Time-based'
-        else:
-            filtered.loc[filtered['Network'] == 'Tesla', 'kWh Based Pricing'] = 'Yes'
-            filtered.loc[filtered['Network'] == 'Tesla', 'Time Based Pricing'] = 'No'
-            filtered.loc[filtered['Network'] == 'Tesla', 'Tiered Pricing for L3'] = 'No'
-
-            filtered.loc[filtered['Network'] == 'Tesla', 'Pricing Approach'] = 'Energy-based'
-
-    # Apply overrides for Shell Recharge
-    if 'Shell Recharge' in filtered['Network'].values:
-        if province_acronym == 'MB':
-            filtered.loc[filtered['Network'] == 'Shell Recharge', 'kWh Based Pricing'] = 'No'
-            filtered.loc[filtered['Network'] == 'Shell Recharge', 'Time Based Pricing'] = 'Yes'
-        else:
-            filtered.loc[filtered['Network'] == 'Shell Recharge', 'kWh Based Pricing'] = 'Yes'
-            filtered.loc[filtered['Network'] == 'Shell Recharge', 'Time Based Pricing'] = 'No'
-
-    return filtered
-
-def is_all_non_centralized(df):
-    non_centralized_set = {'Non-Centralized Site-Host', 'Non-Networked'}
-    buckets = [standardized_bucket_map.get(net, 'Non-Networked') for net in df['Network'].unique()]
-    return set(buckets).issubset(non_centralized_set)
-
-def get_used_buckets(df):
-    return sorted(set(standardized_bucket_map.get(n, 'Non-Networked') for n in df['Network'].unique()))
-
-
 # --- Tabs ---
 tab1, tab2 = st.tabs(["🔌 Level 2 Networks", "⚡ Level 3 Networks"])
 
-# Base tables
-l2_table = get_filtered_table_by_level(province, charging_network_data, "L2")
-l3_table = get_filtered_table_by_level(province, charging_network_data, "L3")
-
-# Import pricing range per network/province by power level
-level2_pricing = pd.read_csv("L2_pricing.csv")
-level3_pricing = pd.read_csv("L3_pricing.csv")
-
-# Pricing lookups
-L2_pricing_indexed = level2_pricing.set_index("Network")
-l2_table["Pricing Range"] = l2_table["Network"].map(
-    lambda n: L2_pricing_indexed.loc[n, province_full_name]
-    if n in L2_pricing_indexed.index else "N/A"
-)
-
-L3_pricing_indexed = level3_pricing.set_index("Network")
-l3_table["Pricing Range"] = l3_table["Network"].map(
-    lambda n: L3_pricing_indexed.loc[n, province_full_name]
-    if (n in L3_pricing_indexed.index and province_full_name in L3_pricing_indexed.columns)
-    else "N/A"
-)
-
-# Column order
-l2_table = l2_table[[
-    "Network", "Station Power Level Range (kW)", "Pricing Approach",
-    "Pricing Range", "Network App and roaming partners"
-]]
-l3_table = l3_table[[
-    "Network", "Station Power Level Range (kW)", "Pricing Approach",
-    "Pricing Range", "Idle Fees Applied", "Network App and roaming partners"
-]]
-
-# Friendly missing text (handle both NaN and explicit "N/A")
-l2_table = l2_table.replace("N/A", pd.NA).fillna("Not available")
-l3_table = l3_table.replace("N/A", pd.NA).fillna("Not available")
-
-# Shared styling helper: highlight rows + center headers & cells
-def style_table(df):
-    return (
-        df.style
-          .apply(highlight_by_bucket, axis=1)
-          .hide(axis="index")
-          .set_table_styles([
-              {"selector": "th", "props": [
-                  ("text-align", "center"),
-                  ("vertical-align", "middle"),
-                  ("white-space", "normal"),
-              ]},
-              {"selector": "td", "props": [
-                  ("text-align", "center"),
-                  ("vertical-align", "middle"),
-                  ("white-space", "normal"),
-                  ("word-break", "break-word"),
-              ]},
-          ])
-          .set_table_attributes('style="width:100%; table-layout:fixed"')
-    )
-
-# --- Display Legend (collect once for both tabs if you need it elsewhere) ---
-used_buckets = set(get_used_buckets(l2_table) + get_used_buckets(l3_table))
-
 # ----- TAB: Level 2 -----
 with tab1:
-    l2_buckets = get_used_buckets(l2_table)
-    if l2_buckets:
-        cols = st.columns(len(l2_buckets))
-        for i, bucket in enumerate(l2_buckets):
-            label = legend_labels.get(bucket, bucket)
-            color = bucket_colors.get(bucket, '')
-            with cols[i]:
-                st.markdown(
-                    f"<div style='{color}; padding: 6px; border-radius: 4px; text-align:center;'>{label}</div>",
-                    unsafe_allow_html=True
-                )
-
-    if l2_table.empty or is_all_non_centralized(l2_table):
-        st.markdown("""
-        <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
-        <b>All Level 2 stations in this province are operated by individual site hosts.</b><br>
-        These use EVSE provider software (like FLO or ChargePoint) under a non-centralized pricing model.
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown(style_table(l2_table).to_html(index=False, escape=False), unsafe_allow_html=True)
+    show_pricing_section(fragments['pricing']['L2'])
 
 # ----- TAB: Level 3 -----
 with tab2:
-    l3_buckets = get_used_buckets(l3_table)
-    if l3_buckets:
-        cols = st.columns(len(l3_buckets))
-        for i, bucket in enumerate(l3_buckets):
-            label = legend_labels.get(bucket, bucket)
-            color = bucket_colors.get(bucket, '')
-            with cols[i]:
-                st.markdown(
-                    f"<div style='{color}; padding: 6px; border-radius: 4px; text-align:center;'>{label}</div>",
-                    unsafe_allow_html=True
-                )
-
-    if l3_table.empty or is_all_non_centralized(l3_table):
-        st.markdown("""
-        <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
-        <b>All Level 3 stations in this province are operated by individual site hosts.</b><br>
-        These use EVSE provider software (like FLO or ChargePoint) under a non-centralized pricing model.
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown(style_table(l3_table).to_html(index=False, escape=False), unsafe_allow_html=True)
+    show_pricing_section(fragments['pricing']['L3'])
+
+
+# --- Stage timings: whole rerun, admin panel and JSON dump ---
+rerun_rss_after = current_rss()
+timings.record("rerun", time.perf_counter() - rerun_started,
+               None if rerun_rss is None or rerun_rss_after is None else rerun_rss_after - rerun_rss)
+
+def is_admin():
+    token = st.query_params.get("admin")
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+COUNTER_TITLES = {"map_html_cache": "Map HTML cache", "telemetry": "Telemetry (dropped: queue full; failed: sink errors)"}
+
+def process_counters():
+    # Process-wide counters reported next to the stage timings
+    return {"map_html_cache": get_map_html_cache().stats(), "telemetry": get_telemetry().stats()}
+
+def show_timings_panel(timings):
+    summary = timings.summary()
+    edges = summary["histogram_edges_ms"]
+    with st.sidebar:
+        st.markdown("### Stage timings")
+        st.caption(f"Last {timings.window} samples per stage in this server process")
+        stats = pd.DataFrame.from_dict(summary["stages"], orient="index").drop(columns="histogram")
+        st.dataframe(stats)
+        st.markdown("Duration histogram (calls per bucket)")
+        labels = [f"<= {edge} ms" for edge in edges] + [f"> {edges[-1]} ms"]
+        st.dataframe(pd.DataFrame({name: stage["histogram"] for name, stage in summary["stages"].items()}, index=labels))
+        counters = process_counters()
+        for name, values in counters.items():
+            st.markdown(COUNTER_TITLES[name])
+            st.dataframe(pd.Series(values, name="value"))
+        st.download_button("Download timings JSON", timings.to_json(**counters), file_name="stage_timings.json",
+                           mime="application/json")
+
+if is_admin():
+    show_timings_panel(timings)
+
+if TIMINGS_FILE:
+    timings.dump(TIMINGS_FILE, **process_counters())
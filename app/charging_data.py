@@ -0,0 +1,431 @@
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Monthly NREL extracts are dropped next to the app as e.g. "alt_fuel_stations_ev_charging_units (May 19 2025).csv"
+STATIONS_CSV_PATTERN = "alt_fuel_stations_ev_charging_units*.csv"
+DEFAULT_STATIONS_CSV = "alt_fuel_stations_ev_charging_units (May 19 2025).csv"
+
+# Typed columnar copy of the processed table, rebuilt whenever the source extract changes
+PROCESSED_CACHE_FILE = "charging_ports.feather"
+CACHE_FORMAT_VERSION = 6
+CACHE_METADATA_KEY = b"chargecompare"
+
+CATEGORY_COLUMNS = ['State', 'EV Network', 'Operator_Bucket', 'Clean_Network_Name']
+FLAG_COLUMNS = ['ports', 'L2_Tesla', 'L3_Tesla', 'ChademoCCSsingleuseport', 'L2_port', 'L3_port']
+
+
+province_map = {
+    'Alberta': 'AB', 'British Columbia': 'BC', 'Manitoba': 'MB', 'New Brunswick': 'NB',
+    'Newfoundland and Labrador': 'NL', 'Nova Scotia': 'NS', 'Ontario': 'ON',
+    'Prince Edward Island': 'PE', 'Quebec': 'QC', 'Saskatchewan': 'SK',
+    'Yukon': 'YT', 'Northwest Territories': 'NT', 'Nunavut': 'NU'
+}
+
+# The only NREL columns the app and the map export read, with compact parse dtypes
+STATION_DTYPES = {
+    'ID': 'Int64',
+    'Station Name': object,
+    'Street Address': object,
+    'City': object,
+    'State': object,
+    'EV Network': object,
+    'EV J1772 Connector Count': 'float32',
+    'EV J3400 Connector Count': 'float32',
+    'EV CCS Connector Count': 'float32',
+    'EV CHAdeMO Connector Count': 'float32',
+    'EV DC Fast Count': 'float32',
+    # float64: float32 coordinates serialize as e.g. 54.26887893676758 even after round(5)
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+}
+INGEST_CHUNKSIZE = 100_000
+
+# Define bucket mapping
+network_bucket_map = {
+    # Centralized utility-backed
+    'BCHYDRO': 'Centralized Utility-Backed',
+    'Circuit électrique': 'Centralized Utility-Backed',
+    'IVY': 'Centralized Utility-Backed',
+    'eCharge Network': 'Centralized Utility-Backed',
+
+    # Centralized automaker-backed
+    'Tesla': 'Centralized Automaker-Backed',
+    'Tesla Destination': 'Centralized Automaker-Backed',
+    'Electrify Canada': 'Centralized Automaker-Backed',
+    'FORD_CHARGE': 'Centralized Automaker-Backed',
+
+    # Centralized fuel/retail-integrated
+    'PETROCAN': 'Centralized Fuel/Retail Integrated',
+    'SHELL_RECHARGE': 'Centralized Fuel/Retail Integrated',
+    'COUCHE_TARD': 'Centralized Fuel/Retail Integrated',
+    'ON_THE_RUN_EV': 'Centralized Fuel/Retail Integrated',
+    '7CHARGE': 'Centralized Fuel/Retail Integrated',
+    'CIRCLE_K': 'Centralized Fuel/Retail Integrated',
+
+    # Non-Centralized site-hosts
+    'AUTEL': 'Non-Centralized Site-Host',
+    'LAKELAND_EV': 'Non-Centralized Site-Host',
+    'ChargePoint Network': 'Non-Centralized Site-Host',
+    'FLO': 'Non-Centralized Site-Host',
+    'SWTCH': 'Non-Centralized Site-Host',
+    'CHARGELAB': 'Non-Centralized Site-Host',
+    'EV Connect': 'Non-Centralized Site-Host',
+    'OpConnect': 'Non-Centralized Site-Host',
+    'JULE': 'Non-Centralized Site-Host',
+    'NOODOE': 'Non-Centralized Site-Host',
+    'AMPUP': 'Non-Centralized Site-Host',
+    'TURNONGREEN': 'Non-Centralized Site-Host',
+    'EVBOLT': 'Non-Centralized Site-Host',
+    'Hwisel': 'Non-Centralized Site-Host',
+    'ZEFNET': 'Non-Centralized Site-Host',
+    'EVGATEWAY': 'Non-Centralized Site-Host',
+    'CHARGEUP': 'Non-Centralized Site-Host',
+    'RED_E': 'Non-Centralized Site-Host',
+    'HONEY_BADGER': 'Non-Centralized Site-Host',
+    'Sun Country Highway': 'Non-Centralized Site-Host',
+
+    # Fallback for unknown or missing
+    'Non-Networked': 'Non-Centralized Site-Host'
+}
+
+# Mapping from 'EV Network' to standardized names
+network_name_mapping = {
+    'Tesla': 'Tesla',
+    'Tesla Destination': 'Tesla',
+    'Electrify Canada': 'Electrify Canada',
+    'SHELL_RECHARGE': 'Shell Recharge',
+    'PETROCAN': 'Petro Canada',
+    'COUCHE_TARD': 'Couche Tard/CircleK',
+    'CIRCLE_K': 'Couche Tard/CircleK',
+    'ON_THE_RUN_EV': 'On The Run EV (Parkland)',
+    'BCHYDRO': 'BC Hydro',
+    'Circuit électrique': 'Electric Circuit (Hydro Quebec)',
+    'IVY': 'Ivy (OPG and Hydro One)',
+    'eCharge Network': 'eCharge (NB power)',
+    'FORD_CHARGE': 'Ford Blue Oval'
+}
+
+# Fixed category sets, so every chunk, cache file and dataset version shares the same integer codes.
+# Networks missing from the mapping tables are appended after KNOWN_NETWORKS at load time.
+PROVINCE_DTYPE = pd.CategoricalDtype(sorted(set(province_map.values())))
+BUCKET_DTYPE = pd.CategoricalDtype(sorted(set(network_bucket_map.values()) | {'Non-Networked'}))
+CLEAN_NETWORK_DTYPE = pd.CategoricalDtype(sorted(set(network_name_mapping.values())))
+KNOWN_NETWORKS = sorted(set(network_bucket_map) | set(network_name_mapping))
+
+
+def network_dtype(networks=()):
+    # Known networks keep their codes; any new ones found in the extract are appended in name order
+    extra = sorted(set(networks) - set(KNOWN_NETWORKS))
+    return pd.CategoricalDtype(KNOWN_NETWORKS + extra)
+
+
+def code_lookup(network_categories, mapping, target_dtype, default=None):
+    """
+    Turns a network -> label mapping into an integer array indexed by EV Network category code,
+    holding target_dtype codes (-1 for unmapped). The extra last slot is what code -1 (a missing
+    network) indexes, so lookup[codes] needs no special case for NaN.
+    """
+    default_code = -1 if default is None else target_dtype.categories.get_loc(default)
+    codes = [target_dtype.categories.get_loc(mapping[net]) if net in mapping else default_code
+             for net in network_categories]
+    return np.array(codes + [default_code], dtype=np.int8)
+
+
+def map_network_codes(networks: pd.Series, mapping, target_dtype, default=None) -> pd.Series:
+    # Categorical equivalent of networks.map(mapping).fillna(default), done on codes, not strings
+    lookup = code_lookup(networks.cat.categories, mapping, target_dtype, default)
+    codes = lookup[networks.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=target_dtype), index=networks.index)
+
+
+def _column(charging_ports, name):
+    # Missing connector columns count as 0, like row.get(name, 0) did
+    if name in charging_ports.columns:
+        return charging_ports[name]
+    return pd.Series(0, index=charging_ports.index)
+
+
+# --- Port flagging (column-wise) ---
+def flag_charging_ports(charging_ports: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the ports, L2_Tesla, L3_Tesla, ChademoCCSsingleuseport, L2_port and L3_port
+    columns to a raw NREL alt-fuel-stations frame using boolean masks instead of row-wise apply.
+    """
+    j1772 = _column(charging_ports, 'EV J1772 Connector Count')
+    j3400 = _column(charging_ports, 'EV J3400 Connector Count')
+
+    # Initialize columns
+    charging_ports["ports"] = np.int8(1)
+
+    # Tesla Level 2 (destination chargers, unless they also carry a J1772 plug)
+    network = charging_ports['EV Network']
+    if isinstance(network.dtype, pd.CategoricalDtype):
+        # Test each category once and broadcast through the codes (last slot: missing network)
+        hits = network.cat.categories.astype(str).str.contains('Tesla Destination', regex=False)
+        hits = np.append(np.asarray(hits, dtype=bool), False)
+        l2_tesla = pd.Series(hits[network.cat.codes.to_numpy()], index=charging_ports.index)
+    else:
+        l2_tesla = network.astype(str).str.contains('Tesla Destination', regex=False)
+    l2_tesla &= ~(j1772 == 1)
+    charging_ports['L2_Tesla'] = l2_tesla.astype('int8')
+
+    # Tesla Level 3
+    l3_tesla = (j3400 == 1) & ~l2_tesla
+    charging_ports['L3_Tesla'] = l3_tesla.astype('int8')
+
+    # DCFC and dual connector adjustment: a CHAdeMO + CCS pair sharing one cable counts as a single port
+    dual = (
+        (charging_ports['EV DC Fast Count'] > 0) &
+        (charging_ports['EV CHAdeMO Connector Count'] == 1) &
+        (charging_ports['EV CCS Connector Count'] == 1)
+    )
+    charging_ports.loc[dual, ['EV CHAdeMO Connector Count', 'EV CCS Connector Count']] = 0
+    charging_ports['ChademoCCSsingleuseport'] = np.where(dual, 1.0, np.nan)
+
+    # Create L2 and L3 port columns
+    charging_ports['L2_port'] = ((j1772 > 0) | l2_tesla).astype('int8')
+    charging_ports['L3_port'] = (
+        (charging_ports['EV CCS Connector Count'] > 0) |
+        (charging_ports['EV CHAdeMO Connector Count'] > 0) |
+        dual |
+        l3_tesla
+    ).astype('int8')
+
+    return charging_ports
+
+
+def _process_chunk(charging_ports):
+    # Canadian rows only, before any other work
+    charging_ports = charging_ports[charging_ports['State'].isin(province_map.values())].copy()
+    charging_ports['State'] = charging_ports['State'].astype(PROVINCE_DTYPE)
+    charging_ports['EV Network'] = charging_ports['EV Network'].astype(
+        network_dtype(charging_ports['EV Network'].dropna().unique()))
+    charging_ports = flag_charging_ports(charging_ports)
+
+    # Apply the bucket mapping
+    charging_ports['Operator_Bucket'] = map_network_codes(charging_ports['EV Network'], network_bucket_map,
+                                                          BUCKET_DTYPE, default='Non-Networked')
+
+    # Apply mapping to create a new column
+    charging_ports['Clean_Network_Name'] = map_network_codes(charging_ports['EV Network'], network_name_mapping,
+                                                             CLEAN_NETWORK_DTYPE)
+
+    # Drop IVY stations outside Ontario
+    charging_ports = charging_ports[~((charging_ports['EV Network'] == 'IVY') & (charging_ports['State'] != 'ON'))]
+
+    charging_ports['ChademoCCSsingleuseport'] = charging_ports['ChademoCCSsingleuseport'].fillna(0).astype('int8')
+    return charging_ports
+
+
+def _concat_chunks(chunks):
+    # pd.concat turns categoricals with different categories into object. Only EV Network can differ
+    # between chunks (unknown networks are appended per chunk), so align it to the union first.
+    dtype = network_dtype(set().union(*(chunk['EV Network'].cat.categories for chunk in chunks)))
+    for chunk in chunks:
+        chunk['EV Network'] = chunk['EV Network'].cat.set_categories(dtype.categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+# Define the function to process the charging ports dataset
+def process_charging_ports_data(file_path, chunksize=INGEST_CHUNKSIZE):
+    """
+    Streams the NREL extract in chunks, keeping only STATION_DTYPES columns, and flags each chunk
+    as it arrives, so peak memory is the processed Canadian rows plus one raw chunk. Rows come back
+    sorted by province, so the result can go straight to province_offsets.
+    """
+    reader = pd.read_csv(file_path, usecols=lambda col: col in STATION_DTYPES, dtype=STATION_DTYPES,
+                         chunksize=chunksize)
+    return sort_by_province(_concat_chunks([_process_chunk(chunk) for chunk in reader]))
+
+
+# --- Source file discovery ---
+def latest_stations_csv(directory="."):
+    """
+    Returns the most recently modified NREL extract in directory, so a new monthly file
+    is picked up without a code change. Falls back to the default file name.
+    """
+    candidates = glob.glob(os.path.join(directory, STATIONS_CSV_PATTERN))
+    if not candidates:
+        return os.path.join(directory, DEFAULT_STATIONS_CSV)
+    return max(candidates, key=os.path.getmtime)
+
+
+def source_signature(file_path):
+    # (path, mtime, size) changes whenever the extract is replaced or edited, without reading the file
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+
+def source_digest(file_path, chunk_size=1 << 20):
+    # sha256 of the file contents: unlike mtime it survives a clone, copy or re-download of the same data
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Province row ranges ---
+def sort_by_province(charging_ports: pd.DataFrame) -> pd.DataFrame:
+    # Stable sort on the State codes: each province becomes one contiguous block, in its original row order
+    order = np.argsort(charging_ports['State'].cat.codes.to_numpy(), kind='stable')
+    return charging_ports.take(order).reset_index(drop=True)
+
+
+def province_offsets(charging_ports: pd.DataFrame) -> dict:
+    """
+    Maps each province code present in a frame sorted by sort_by_province to its (start, stop)
+    row range, found by binary search on the State codes.
+    """
+    codes = charging_ports['State'].cat.codes.to_numpy()
+    if np.any(codes[1:] < codes[:-1]):
+        raise ValueError("charging ports are not sorted by province; use sort_by_province first")
+    categories = charging_ports['State'].cat.categories
+    starts = np.searchsorted(codes, np.arange(len(categories)), side='left')
+    stops = np.searchsorted(codes, np.arange(len(categories)), side='right')
+    return {province: (int(start), int(stop))
+            for province, start, stop in zip(categories, starts, stops) if stop > start}
+
+
+def province_rows(charging_ports: pd.DataFrame, province, offsets) -> pd.DataFrame:
+    """
+    One province as an iloc slice (a view, no row copy). offsets comes from province_offsets,
+    computed once per dataset version by the caller, so a lookup never rescans the frame. (Not
+    kept in DataFrame.attrs: pandas copies attrs onto every slice, where they would be wrong.)
+    """
+    start, stop = offsets.get(province, (0, 0))
+    return charging_ports.iloc[start:stop]
+
+
+# --- Columnar cache of the processed table ---
+def compact_charging_ports(charging_ports: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gives the processed table the compact dtypes used by the columnar cache: fixed-category
+    categoricals for the repeated labels, int8 for the port flags and plain strings for the
+    remaining text columns. Rows come back sorted by province (see province_offsets).
+    """
+    charging_ports = charging_ports.reset_index(drop=True)
+    charging_ports['State'] = charging_ports['State'].astype(PROVINCE_DTYPE)
+    charging_ports['EV Network'] = charging_ports['EV Network'].astype(
+        network_dtype(charging_ports['EV Network'].dropna().unique()))
+    charging_ports['Operator_Bucket'] = charging_ports['Operator_Bucket'].astype(BUCKET_DTYPE)
+    charging_ports['Clean_Network_Name'] = charging_ports['Clean_Network_Name'].astype(CLEAN_NETWORK_DTYPE)
+    charging_ports = sort_by_province(charging_ports)
+    for col in FLAG_COLUMNS:
+        charging_ports[col] = charging_ports[col].fillna(0).astype('int8')
+
+    # Free-text NREL columns can mix numbers and strings (e.g. ZIP codes), which Arrow rejects
+    for col in charging_ports.columns[charging_ports.dtypes == object]:
+        values = charging_ports[col]
+        charging_ports[col] = values.where(values.isna(), values.astype(str))
+
+    return charging_ports
+
+
+def write_processed_cache(charging_ports, source_path, cache_path=PROCESSED_CACHE_FILE):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(compact_charging_ports(charging_ports), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[CACHE_METADATA_KEY] = json.dumps({
+        "version": CACHE_FORMAT_VERSION,
+        "source": os.path.basename(source_path),
+        "size": os.path.getsize(source_path),
+        "sha256": source_digest(source_path),
+    }).encode()
+
+    # Uncompressed so readers can memory-map it; written aside and swapped in atomically
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    feather.write_feather(table.replace_schema_metadata(metadata), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+
+
+def read_processed_cache(source_path, cache_path=PROCESSED_CACHE_FILE):
+    """
+    Reads the columnar cache through a memory map. Numeric columns without nulls are used in place;
+    categorical and string columns are still converted (copied) into pandas. Returns None when the
+    cache is missing, has an older layout (CACHE_FORMAT_VERSION) or was built from different source
+    contents (size and sha256 are compared, so a cache shipped next to a freshly cloned or copied
+    extract stays valid). Without the source file only the layout version is checked.
+    """
+    import pyarrow.feather as feather
+
+    if not os.path.exists(cache_path):
+        return None
+
+    table = feather.read_table(cache_path, memory_map=True)
+    info = json.loads((table.schema.metadata or {}).get(CACHE_METADATA_KEY, b"{}"))
+    if info.get("version") != CACHE_FORMAT_VERSION:
+        return None
+
+    # Deployed with only the prebuilt cache: no source contents to compare against.
+    # Otherwise the size check is free and rules out most stale caches before the file is hashed
+    if os.path.exists(source_path) and (info.get("size") != os.path.getsize(source_path)
+                                        or info.get("sha256") != source_digest(source_path)):
+        return None
+
+    return table.to_pandas(split_blocks=True)
+
+
+def load_processed_charging_ports(source_path, cache_path=PROCESSED_CACHE_FILE):
+    # Fast path: the prebuilt columnar file; slow path: parse the CSV and refresh the cache
+    charging_ports = read_processed_cache(source_path, cache_path)
+    if charging_ports is not None:
+        return charging_ports
+
+    charging_ports = compact_charging_ports(process_charging_ports_data(source_path))
+    try:
+        write_processed_cache(charging_ports, source_path, cache_path)
+    except OSError:
+        # Read-only deployments still work, they just parse the CSV on cold start
+        pass
+    return charging_ports
+
+
+# --- Station-level view (one row per site instead of one per charging unit) ---
+def station_keys(charging_ports: pd.DataFrame) -> pd.Series:
+    # NREL station ID when present, otherwise rounded coordinates (~10 m) plus street address; the
+    # fallback is per row, so units without an ID never collapse into one 'nan' station
+    fallback = (charging_ports['Latitude'].round(4).astype(str) + ',' + charging_ports['Longitude'].round(4).astype(str)
+                + '|' + charging_ports['Street Address'].astype(str).str.strip().str.lower())
+    if 'ID' not in charging_ports.columns:
+        return fallback
+    ids = charging_ports['ID']
+    if pd.api.types.is_float_dtype(ids):
+        # IDs parsed as floats (any NaN in a plain read_csv) would otherwise give keys like '123.0'
+        ids = ids.astype('Int64')
+    return ids.astype(str).where(ids.notna(), fallback)
+
+
+def aggregate_stations(charging_ports: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapses co-located charging units into one row per station with L2/L3 port counts and the
+    comma-separated list of networks. Port-level totals are unaffected: L2_ports/L3_ports sum back
+    to the L2_port/L3_port flags of the input.
+    """
+    ports = charging_ports.assign(station_key=station_keys(charging_ports).to_numpy())
+    grouped = ports.groupby('station_key', sort=False)
+
+    stations = grouped.agg(**{
+        'Station Name': ('Station Name', 'first'),
+        'Street Address': ('Street Address', 'first'),
+        'City': ('City', 'first'),
+        'State': ('State', 'first'),
+        'Latitude': ('Latitude', 'first'),
+        'Longitude': ('Longitude', 'first'),
+        'ports': ('ports', 'sum'),
+        'L2_ports': ('L2_port', 'sum'),
+        'L3_ports': ('L3_port', 'sum'),
+    })
+
+    networks = ports[['station_key', 'EV Network']].dropna().astype({'EV Network': str}).drop_duplicates()
+    networks = networks.sort_values('EV Network').groupby('station_key', sort=False)['EV Network'].agg(', '.join)
+    stations['Networks'] = networks.reindex(stations.index).fillna('Non-Networked')
+
+    return stations.reset_index()
@@ -0,0 +1,116 @@
+import pandas as pd
+
+from province_cube import bucket_totals, province_slice
+
+# Chart ids: the port-level bar chart and one operator-type chart per port level
+CHARTS = ("ports", "L2_port", "L3_port")
+
+PORT_LEVEL_COLORS = {'Level 2': '#015A06', 'Level 3': '#999999'}
+
+ORDERED_BUCKETS = [
+    'Centralized Fuel/Retail Integrated',
+    'Centralized Automaker-Backed',
+    'Centralized Utility-Backed',
+    'Non-Centralized Site-Host']
+
+# Define color map based on fixed category-color mapping
+BUCKET_COLORS = {
+    'Centralized Fuel/Retail Integrated': '#E1B97C',  # soft amber
+    'Centralized Automaker-Backed': '#C08D87',  # clay rose
+    'Centralized Utility-Backed': '#4A6484',  # steel blue
+    'Non-Centralized Site-Host': '#6C8C78'  # muted green
+}
+
+
+# --- Chart data (shared by the matplotlib and the client-side backends) ---
+def port_counts(cube: dict, province) -> pd.Series:
+    # Sum Level 2 and Level 3 ports
+    return pd.Series({
+        'L2_port': province_slice(cube, province, 'L2_port')['ports'].sum(),
+        'L3_port': province_slice(cube, province, 'L3_port')['ports'].sum(),
+    })
+
+
+def operator_type_shares(cube: dict, province_code, level) -> pd.DataFrame:
+    # Port count and proportion per operator bucket, in ORDERED_BUCKETS order (buckets without ports omitted)
+    bucket_counts = bucket_totals(cube, province_code, level).rename('Count').reset_index()
+    bucket_counts['Operator_Bucket'] = bucket_counts['Operator_Bucket'].astype(str)
+    bucket_counts['Proportion'] = bucket_counts['Count'] / bucket_counts['Count'].sum()
+
+    bucket_counts['Operator_Bucket'] = pd.Categorical(bucket_counts['Operator_Bucket'], categories=ORDERED_BUCKETS, ordered=True)
+    return bucket_counts.sort_values('Operator_Bucket').dropna(subset=['Operator_Bucket'])
+
+
+def percent_label(proportion):
+    return f"{proportion * 100:.0f}%"
+
+
+def label_color(proportion):
+    # Pick label color based on bar fill height for readability
+    return 'white' if proportion >= 0.12 else 'black'
+
+
+# --- Vega-Lite specs, drawn in the browser by st.vega_lite_chart ---
+def ports_chart_spec(cube: dict, province) -> dict:
+    counts = port_counts(cube, province)
+    levels = list(PORT_LEVEL_COLORS)
+    return {
+        'data': {'values': [{'level': level, 'ports': int(count)} for level, count in zip(levels, counts)]},
+        'mark': {'type': 'bar'},
+        'encoding': {
+            'x': {'field': 'level', 'type': 'nominal', 'sort': levels, 'title': 'Power Level',
+                  'axis': {'labelAngle': 0, 'labelFontSize': 12, 'titleFontSize': 12}},
+            'y': {'field': 'ports', 'type': 'quantitative', 'title': 'Number of Ports',
+                  'axis': {'gridDash': [4, 4], 'labelFontSize': 12, 'titleFontSize': 12}},
+            'color': {'field': 'level', 'type': 'nominal', 'legend': None,
+                      'scale': {'domain': levels, 'range': list(PORT_LEVEL_COLORS.values())}},
+        },
+    }
+
+
+def operator_type_chart_spec(cube: dict, province_code, level) -> dict:
+    """
+    Proportion of ports per operator type, with the same colors and in-bar percent labels as the
+    matplotlib chart. Labels and their colors are computed here so both backends print identical text.
+    None when the province has no ports of that level, so there is nothing to draw.
+    """
+    shares = operator_type_shares(cube, province_code, level)
+    if shares.empty:
+        return None
+    rows = [{'bucket': str(bucket), 'count': int(count), 'proportion': float(proportion),
+             'label': percent_label(proportion), 'label_color': label_color(proportion)}
+            for bucket, count, proportion in zip(shares['Operator_Bucket'], shares['Count'], shares['Proportion'])]
+    return {
+        'data': {'values': rows},
+        'encoding': {
+            'x': {'field': 'bucket', 'type': 'nominal', 'sort': ORDERED_BUCKETS, 'title': 'Operator Type',
+                  'axis': {'labelAngle': -30, 'titleFontSize': 12}},
+        },
+        'layer': [
+            {
+                'mark': {'type': 'bar'},
+                'encoding': {
+                    'y': {'field': 'proportion', 'type': 'quantitative', 'title': 'Proportion of Charging Ports',
+                          'scale': {'domain': [0, 1]}, 'axis': {'format': '.0%', 'titleFontSize': 12}},
+                    'color': {'field': 'bucket', 'type': 'nominal', 'legend': None,
+                              'scale': {'domain': ORDERED_BUCKETS, 'range': [BUCKET_COLORS[b] for b in ORDERED_BUCKETS]}},
+                },
+            },
+            {
+                'transform': [{'filter': 'datum.proportion > 0'},
+                              {'calculate': 'datum.proportion / 2', 'as': 'label_y'}],
+                'mark': {'type': 'text', 'fontSize': 11, 'fontWeight': 'bold'},
+                'encoding': {
+                    'y': {'field': 'label_y', 'type': 'quantitative'},
+                    'text': {'field': 'label'},
+                    'color': {'field': 'label_color', 'type': 'nominal', 'scale': None},
+                },
+            },
+        ],
+    }
+
+
+def chart_spec(cube: dict, province, chart) -> dict:
+    if chart == "ports":
+        return ports_chart_spec(cube, province)
+    return operator_type_chart_spec(cube, province, chart)
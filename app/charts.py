@@ -0,0 +1,124 @@
+import io
+
+import matplotlib
+
+# Headless rendering: charts are only ever saved to bytes, never shown in a window
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import matplotlib.ticker as mtick
+
+from chart_specs import (
+    BUCKET_COLORS, CHARTS, PORT_LEVEL_COLORS, label_color, operator_type_shares, percent_label, port_counts,
+)
+
+# Same savefig settings st.pyplot applies, so cached images look exactly like the live figures
+SAVEFIG_KWARGS = {"bbox_inches": "tight", "dpi": 200}
+CHART_FORMATS = ("png", "svg")
+
+# st.image downsizes any bitmap wider than this (its maximum content width) on every call;
+# doing the same resize once at render time keeps reruns from re-decoding the PNG
+MAX_IMAGE_WIDTH = 2 * 730
+
+
+# Function to generate the plot and description
+def plot_ports_by_province(cube: dict, province):
+    # Create bar plot
+    fig, ax = plt.subplots(figsize=(7, 5))
+    port_counts(cube, province).plot(
+        kind='bar',
+        ax=ax,
+        color=list(PORT_LEVEL_COLORS.values())
+    )
+
+    # Add horizontal grid lines
+    ax.yaxis.grid(True, linestyle='--', alpha=0.7)
+
+    # Customize the plot
+    ax.set_ylabel('Number of Ports', fontsize=12)
+    ax.set_xlabel('Power Level', fontsize=12)
+    ax.set_xticklabels(['Level 2', 'Level 3'], rotation=0, fontsize=12)
+    ax.tick_params(axis='y', labelsize=12)
+
+    return fig
+
+
+def plot_operator_type_distribution_by_province(cube, province_code, level):
+    # level = 'L2_port' or 'L3_port'
+    bucket_counts = operator_type_shares(cube, province_code, level)
+    if bucket_counts.empty:
+        # No ports of this level: nothing to draw (None, like the operator insight helper)
+        return None
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    bucket_counts['Color'] = bucket_counts['Operator_Bucket'].map(BUCKET_COLORS)
+    bucket_counts.plot(kind='bar', x='Operator_Bucket', y='Proportion', legend=False, color=bucket_counts['Color'], ax=ax)
+
+    # Format y-axis as %
+    ax.yaxis.set_major_formatter(mtick.PercentFormatter(xmax=1.0, decimals=0))
+
+    # Add % labels on bars (placed inside the bar for reliability with ylim=0..1)
+    for patch in ax.patches:
+        height = patch.get_height()
+        if height > 0:  # avoid divide-by-zero/labels on empty bars
+            x = patch.get_x() + patch.get_width() / 2
+            y = height / 2
+            ax.text(
+                x, y,
+                percent_label(height),
+                ha='center', va='center',
+                fontsize=11, fontweight='bold',
+                color=label_color(height)
+            )
+
+    ax.set_ylabel('Proportion of Charging Ports', fontsize=12)
+    ax.set_xlabel('Operator Type', fontsize=12)
+    ax.set_ylim(0, 1)
+    ax.tick_params(axis='x', labelrotation=30)
+    fig.tight_layout()
+    return fig
+
+
+# --- Rendered chart images ---
+def render_figure(fig, fmt="png") -> bytes:
+    # Saves the figure and closes it, so it does not stay registered in pyplot's global figure list
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=fmt, **SAVEFIG_KWARGS)
+    finally:
+        plt.close(fig)
+    if fmt == "png":
+        return fit_image_width(buffer.getvalue())
+    return buffer.getvalue()
+
+
+def fit_image_width(png_bytes, max_width=MAX_IMAGE_WIDTH):
+    # Same bilinear downscale st.image would apply, so the displayed image does not change
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png_bytes))
+    if image.width <= max_width:
+        return png_bytes
+    image = image.resize((max_width, int(1.0 * image.height * max_width / image.width)), resample=Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_chart(cube: dict, province, chart, fmt="png"):
+    # Image bytes, or None when the chart has nothing to draw
+    if chart == "ports":
+        fig = plot_ports_by_province(cube, province)
+    else:
+        fig = plot_operator_type_distribution_by_province(cube, province, chart)
+    return render_figure(fig, fmt) if fig is not None else None
+
+
+def prerender_charts(cube: dict, provinces, fmt="png") -> dict:
+    """
+    Renders every chart for every province in one batch and returns {(province, chart): bytes}, with
+    None for a chart that has nothing to draw (a province without ports of that level).
+    The caller keys the result by dataset version, so the images are rebuilt only when the data changes.
+    """
+    return {(province, chart): render_chart(cube, province, chart, fmt)
+            for province in provinces for chart in CHARTS}
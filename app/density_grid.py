@@ -0,0 +1,222 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from charging_data import BUCKET_DTYPE, PROVINCE_DTYPE, source_digest
+
+# Written by Additional_Files/download_maps_.py --density-grid; rebuilt in-process when missing or stale
+DENSITY_GRID_FILE = "density_grid.npz"
+DENSITY_GRID_VERSION = 2
+
+# Cells are web-mercator tiles at these zooms (~440, ~110, ~28 and ~7 km wide at 45°N)
+GRID_ZOOMS = (6, 8, 10, 12)
+# Port weights counted per level; 'ports' counts every port
+GRID_LEVELS = ('ports', 'L2_port', 'L3_port')
+
+
+def tile_coordinates(lat, lon, zoom):
+    # Slippy-map (web mercator) tile x/y for arrays of coordinates
+    n = 2 ** zoom
+    lat_rad = np.radians(np.asarray(lat, dtype='float64'))
+    x = np.floor((np.asarray(lon, dtype='float64') + 180.0) / 360.0 * n).astype('int64')
+    y = np.floor((1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * n).astype('int64')
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+def tile_bounds(x, y, zoom):
+    # (south, west, north, east) edges in degrees of tiles, for arrays of x/y
+    n = 2 ** zoom
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    west, east = x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+
+def build_density_grid(charging_ports: pd.DataFrame, zooms=GRID_ZOOMS) -> dict:
+    """
+    Bins the ports into tile cells per province, level and zoom. Returns flat arrays, one entry per
+    non-empty cell, sorted by (province, level, zoom, x, y): province/bucket codes (positions in
+    PROVINCE_DTYPE/BUCKET_DTYPE categories), level position in GRID_LEVELS, zoom, x, y, the port count
+    of the level, the L3 share of all ports in the cell and the level's dominant operator bucket.
+    Its size depends on how many cells are covered, not on the number of stations.
+    """
+    located = charging_ports.dropna(subset=['Latitude', 'Longitude'])
+    base = pd.DataFrame({
+        'province': located['State'].astype(PROVINCE_DTYPE).cat.codes.to_numpy(),
+        'bucket': located['Operator_Bucket'].astype(BUCKET_DTYPE).cat.codes.to_numpy(),
+        'ports': located['ports'].to_numpy('int32'),
+        'L2_port': located['L2_port'].to_numpy('int32'),
+        'L3_port': located['L3_port'].to_numpy('int32'),
+    })
+    cell_keys = ['province', 'x', 'y']
+
+    parts = []
+    for zoom in zooms:
+        x, y = tile_coordinates(located['Latitude'], located['Longitude'], zoom)
+        points = base.assign(x=x, y=y)
+        cells = points.groupby(cell_keys, sort=False)[list(GRID_LEVELS)].sum()
+        by_bucket = points.groupby(cell_keys + ['bucket'], sort=False)[list(GRID_LEVELS)].sum().reset_index()
+        l3_share = (cells['L3_port'] / (cells['L2_port'] + cells['L3_port']).where(lambda total: total > 0)).fillna(0)
+
+        for level_pos, level in enumerate(GRID_LEVELS):
+            counts = cells[level]
+            counts = counts[counts > 0]
+            # Largest bucket per cell; ties go to the first bucket in category order
+            dominant = (by_bucket[by_bucket[level] > 0]
+                        .sort_values([level, 'bucket'], ascending=[False, True], kind='stable')
+                        .drop_duplicates(cell_keys)
+                        .set_index(cell_keys)['bucket'])
+            parts.append(pd.DataFrame({
+                'level': np.int8(level_pos),
+                'zoom': np.int8(zoom),
+                'count': counts.astype('int32'),
+                'l3_share': l3_share.reindex(counts.index).astype('float32'),
+                'bucket': dominant.reindex(counts.index).fillna(-1).astype('int8'),
+            }).reset_index())
+
+    grid = pd.concat(parts, ignore_index=True).sort_values(['province', 'level', 'zoom', 'x', 'y'], kind='stable')
+    return {
+        'province': grid['province'].to_numpy('int8'),
+        'level': grid['level'].to_numpy('int8'),
+        'zoom': grid['zoom'].to_numpy('int8'),
+        'x': grid['x'].to_numpy('int32'),
+        'y': grid['y'].to_numpy('int32'),
+        'count': grid['count'].to_numpy('int32'),
+        'l3_share': grid['l3_share'].to_numpy('float32'),
+        'bucket': grid['bucket'].to_numpy('int8'),
+    }
+
+
+def write_density_grid(grid, source_path, path=DENSITY_GRID_FILE):
+    # One compressed .npz with the cell arrays, the category lists and the source file's size and sha256
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(
+        tmp_path, **grid,
+        provinces=np.array(PROVINCE_DTYPE.categories, dtype=str),
+        buckets=np.array(BUCKET_DTYPE.categories, dtype=str),
+        levels=np.array(GRID_LEVELS, dtype=str),
+        meta=np.array([DENSITY_GRID_VERSION, os.path.getsize(source_path)], dtype='int64'),
+        source_sha256=np.array(source_digest(source_path)),
+    )
+    os.replace(tmp_path, path)
+
+
+def load_density_grid(source_path, path=DENSITY_GRID_FILE):
+    """
+    The stored grid when it has the current layout and was built from the same source contents (size,
+    then sha256), or when the source file is absent (deployed with only the exported grid); else None.
+    """
+    if not os.path.exists(path):
+        return None
+    source_present = os.path.exists(source_path)
+    with np.load(path) as stored:
+        if (stored['meta'][0] != DENSITY_GRID_VERSION
+                or (source_present and (stored['meta'][1] != os.path.getsize(source_path)
+                                        or str(stored['source_sha256']) != source_digest(source_path)))
+                or stored['provinces'].tolist() != list(PROVINCE_DTYPE.categories)
+                or stored['buckets'].tolist() != list(BUCKET_DTYPE.categories)
+                or stored['levels'].tolist() != list(GRID_LEVELS)):
+            return None
+        return {name: stored[name] for name in ('province', 'level', 'zoom', 'x', 'y', 'count', 'l3_share', 'bucket')}
+
+
+def province_cells(grid, province_code, level):
+    # {zoom: [[south, west, north, east, count, l3 share, bucket], ...]} for one province and level
+    province_pos = PROVINCE_DTYPE.categories.get_loc(province_code)
+    lo, hi = np.searchsorted(grid['province'], [province_pos, province_pos + 1])
+    selected = np.flatnonzero(grid['level'][lo:hi] == GRID_LEVELS.index(level)) + lo
+    buckets = list(BUCKET_DTYPE.categories)
+
+    cells = {}
+    for zoom in np.unique(grid['zoom'][selected]):
+        rows = selected[grid['zoom'][selected] == zoom]
+        south, west, north, east = tile_bounds(grid['x'][rows], grid['y'][rows], int(zoom))
+        cells[int(zoom)] = [
+            [round(s, 5), round(w, 5), round(n, 5), round(e, 5), int(count), round(float(share), 3),
+             buckets[bucket] if bucket >= 0 else None]
+            for s, w, n, e, count, share, bucket in zip(south.tolist(), west.tolist(), north.tolist(), east.tolist(),
+                                                       grid['count'][rows], grid['l3_share'][rows], grid['bucket'][rows])
+        ]
+    return cells
+
+
+def render_density_map(grid, province_code, level):
+    """
+    A small Leaflet page drawing one province's cells as a choropleth (colour by port count on a log
+    scale). The grid resolution follows the map zoom, so the page never draws more than the cells of
+    one zoom; nothing in it grows with the number of stations in a cell.
+    """
+    cells = province_cells(grid, province_code, level)
+    return DENSITY_MAP_TEMPLATE.replace("__CELLS__", json.dumps(cells, separators=(",", ":")))
+
+
+DENSITY_MAP_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="content-type" content="text/html; charset=UTF-8" />
+<style>html, body, #map {width: 100%; height: 100%; margin: 0; padding: 0;}
+.legend {background: white; padding: 6px 8px; font: 12px sans-serif; border-radius: 4px;}</style>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var cells = __CELLS__;
+var zooms = Object.keys(cells).map(Number).sort(function (a, b) { return a - b; });
+var map = L.map("map", {zoom: 5, center: [56, -96]});
+L.tileLayer("https://tile.openstreetmap.org/{z}/{x}/{y}.png", {
+    maxZoom: 19, attribution: "&copy; OpenStreetMap contributors"
+}).addTo(map);
+
+var palette = ["#edf8e9", "#bae4b3", "#74c476", "#31a354", "#006d2c"];
+function color(count, maxCount) {
+    var step = Math.log(count) / Math.log(Math.max(maxCount, 2));
+    return palette[Math.min(palette.length - 1, Math.floor(step * palette.length))];
+}
+
+var layer = L.layerGroup().addTo(map);
+var shownZoom = null;
+function gridZoom() {
+    // Finest grid whose cells are still at least ~32 px wide at the current map zoom
+    var fit = zooms.filter(function (z) { return z <= map.getZoom() + 3; });
+    return fit.length ? fit[fit.length - 1] : zooms[0];
+}
+function draw() {
+    var z = gridZoom();
+    if (z === shownZoom) { return; }
+    shownZoom = z;
+    layer.clearLayers();
+    var rows = cells[z] || [];
+    var maxCount = rows.reduce(function (m, row) { return Math.max(m, row[4]); }, 1);
+    rows.forEach(function (row) {
+        L.rectangle([[row[0], row[1]], [row[2], row[3]]], {
+            color: "#555", weight: 0.5, fillColor: color(row[4], maxCount), fillOpacity: 0.7
+        }).bindTooltip(row[4] + " ports<br>L3 share: " + Math.round(row[5] * 100) + "%<br>" + row[6]).addTo(layer);
+    });
+}
+
+if (zooms.length) {
+    var coarse = cells[zooms[0]];
+    map.fitBounds(coarse.map(function (row) { return [[row[0], row[1]], [row[2], row[3]]]; })
+        .reduce(function (b, r) { return b.extend(r); }, L.latLngBounds(coarse[0].slice(0, 2), coarse[0].slice(2, 4))));
+}
+map.on("zoomend", draw);
+draw();
+
+var legend = L.control({position: "bottomright"});
+legend.onAdd = function () {
+    var div = L.DomUtil.create("div", "legend");
+    div.innerHTML = "Ports per cell (log scale)<br>" + palette.map(function (c) {
+        return "<i style='display:inline-block;width:14px;height:14px;background:" + c + "'></i>";
+    }).join("") + "<br>fewer &rarr; more";
+    return div;
+};
+legend.addTo(map);
+</script>
+</body>
+</html>
+"""
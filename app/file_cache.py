@@ -0,0 +1,88 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class FileContentCache:
+    """
+    Thread-safe LRU cache of file contents, bounded by total size in bytes.
+
+    Entries are keyed by path (and text/binary mode) and revalidated against the file's mtime/size
+    on every read (a stat, no read), so regenerated files are picked up without a restart. Files
+    larger than max_bytes are returned but never cached.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (path, mode) -> (mtime_ns, size, content, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def read_text(self, path, encoding="utf-8"):
+        # Returns the file's text, or None when it does not exist
+        return self._read(path, "r", encoding)
+
+    def read_bytes(self, path):
+        # Returns the file's raw bytes (e.g. a precompressed .gz/.br artifact), or None when it does not exist
+        return self._read(path, "rb", None)
+
+    def _read(self, path, mode, encoding):
+        key = (path, mode)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(key)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        with open(path, mode, encoding=encoding) as f:
+            content = f.read()
+        self._store(key, (stat.st_mtime_ns, stat.st_size, content, stat.st_size))
+        return content
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._drop(key)
+            if entry[3] > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry[3]
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+
+    def invalidate(self, key=None):
+        # Forget one (path, mode) entry, or everything when key is None
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
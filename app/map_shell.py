@@ -0,0 +1,136 @@
+import json
+import os
+
+# Pre-tiled station chunks written by Additional_Files/download_maps_.py --tiles and served by
+# Streamlit's static file server (server.enableStaticServing in .streamlit/config.toml)
+TILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "tiles")
+TILES_URL = os.environ.get("CHARGECOMPARE_TILES_URL", "/app/static/tiles")
+
+# Below this map zoom the shell only draws per-tile counts from the index, never individual points
+DETAIL_MIN_ZOOM = 9
+
+LEVEL_LAYERS = {
+    'L2_port': {'name': 'Level 2 Charging', 'color': 'green', 'icon': 'flash', 'fill': '#015A06'},
+    'L3_port': {'name': 'Level 3 Charging', 'color': 'red', 'icon': 'bolt', 'fill': '#B22222'},
+}
+
+
+def load_tile_index(province_code, tiles_dir=TILES_DIR):
+    # Small per-province index (center, bounds, per-tile counts); None when tiles were not exported
+    index_file = os.path.join(tiles_dir, province_code, "index.json")
+    if not os.path.exists(index_file):
+        return None
+    with open(index_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def render_map_shell(province_code, tile_index, tiles_url=TILES_URL):
+    """
+    Returns a lightweight Leaflet page for one province. It inlines only the tile index; station
+    points are fetched tile by tile for the visible viewport once the user zooms in.
+    """
+    config = {
+        'province': province_code,
+        'tilesUrl': tiles_url.rstrip('/'),
+        'detailMinZoom': DETAIL_MIN_ZOOM,
+        'index': tile_index,
+        'levels': LEVEL_LAYERS,
+    }
+    return MAP_SHELL_TEMPLATE.replace("__CONFIG__", json.dumps(config))
+
+
+MAP_SHELL_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="content-type" content="text/html; charset=UTF-8" />
+<style>html, body, #map {width: 100%; height: 100%; margin: 0; padding: 0;}</style>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/Leaflet.awesome-markers/2.0.2/leaflet.awesome-markers.js"></script>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/leaflet.markercluster.js"></script>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/leaflet-locatecontrol/0.66.2/L.Control.Locate.min.js"></script>
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/@fortawesome/fontawesome-free@6.2.0/css/all.min.css"/>
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/Leaflet.awesome-markers/2.0.2/leaflet.awesome-markers.css"/>
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css"/>
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css"/>
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet-locatecontrol/0.66.2/L.Control.Locate.min.css"/>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var config = __CONFIG__;
+var index = config.index;
+var map = L.map("map", {center: index.center, zoom: 6});
+L.tileLayer("https://tile.openstreetmap.org/{z}/{x}/{y}.png", {
+    maxZoom: 19, attribution: "&copy; OpenStreetMap contributors"
+}).addTo(map);
+map.fitBounds(index.bounds);
+
+function tileX(lon, z) { return Math.floor((lon + 180) / 360 * Math.pow(2, z)); }
+function tileY(lat, z) {
+    var rad = lat * Math.PI / 180;
+    return Math.floor((1 - Math.log(Math.tan(rad) + 1 / Math.cos(rad)) / Math.PI) / 2 * Math.pow(2, z));
+}
+
+var overlays = {};
+var levels = {};
+Object.keys(config.levels).forEach(function (level) {
+    var style = config.levels[level];
+    var icon = L.AwesomeMarkers.icon({markerColor: style.color, iconColor: "white", icon: style.icon, prefix: "fa"});
+    var tiles = (index.levels[level] || {}).tiles || {};
+    var overview = L.layerGroup();
+    Object.keys(tiles).forEach(function (key) {
+        var tile = tiles[key];
+        L.circleMarker([tile.lat, tile.lon], {
+            radius: 4 + Math.min(16, Math.sqrt(tile.count)), color: style.fill, fillOpacity: 0.6, weight: 1
+        }).bindTooltip(tile.count + " " + style.name.toLowerCase() + " points").addTo(overview);
+    });
+    var state = {icon: icon, tiles: tiles, overview: overview, cluster: L.markerClusterGroup(), loaded: {},
+                 container: L.layerGroup()};
+    state.container.addTo(map);
+    levels[level] = state;
+    overlays[style.name] = state.container;
+});
+
+function loadVisibleTiles(level, state) {
+    var z = index.tile_zoom;
+    var bounds = map.getBounds();
+    var x0 = tileX(bounds.getWest(), z), x1 = tileX(bounds.getEast(), z);
+    var y0 = tileY(bounds.getNorth(), z), y1 = tileY(bounds.getSouth(), z);
+    for (var x = x0; x <= x1; x++) {
+        for (var y = y0; y <= y1; y++) {
+            var key = x + "/" + y;
+            if (!state.tiles[key] || state.loaded[key]) { continue; }
+            state.loaded[key] = true;
+            fetch(config.tilesUrl + "/" + config.province + "/" + level + "/" + z + "/" + key + ".json")
+                .then(function (response) { return response.json(); })
+                .then(function (rows) {
+                    state.cluster.addLayers(rows.map(function (row) {
+                        return L.marker([row[0], row[1]], {icon: state.icon}).bindPopup(row[2]);
+                    }));
+                });
+        }
+    }
+}
+
+function refresh() {
+    var detailed = map.getZoom() >= config.detailMinZoom;
+    Object.keys(levels).forEach(function (level) {
+        var state = levels[level];
+        if (state.detailed !== detailed) {
+            state.container.clearLayers();
+            state.container.addLayer(detailed ? state.cluster : state.overview);
+            state.detailed = detailed;
+        }
+        if (detailed && map.hasLayer(state.container)) { loadVisibleTiles(level, state); }
+    });
+}
+
+map.on("moveend overlayadd", refresh);
+refresh();
+L.control.locate({}).addTo(map);
+L.control.layers(null, overlays, {collapsed: false}).addTo(map);
+</script>
+</body>
+</html>
+"""
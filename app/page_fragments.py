@@ -0,0 +1,194 @@
+from pricing import LEVEL_COLUMNS, get_filtered_table_by_level
+from province_cube import bucket_totals, province_slice
+
+# --- Standardization and Styling Maps ---
+standardized_bucket_map = {
+    'Tesla': 'Centralized Automaker-Backed',
+    'Electrify Canada': 'Centralized Automaker-Backed',
+    'Ford Blue Oval': 'Centralized Automaker-Backed',
+    'Shell Recharge': 'Centralized Fuel/Retail Integrated',
+    'Petro Canada': 'Centralized Fuel/Retail Integrated',
+    'Couche Tard/CircleK': 'Centralized Fuel/Retail Integrated',
+    'On The Run EV (Parkland)': 'Centralized Fuel/Retail Integrated',
+    'BC Hydro': 'Centralized Utility-Backed',
+    'Electric Circuit (Hydro Quebec)': 'Centralized Utility-Backed',
+    'Ivy (OPG and Hydro One)': 'Centralized Utility-Backed',
+    'eCharge (NB power)': 'Centralized Utility-Backed',
+}
+bucket_colors = {
+    'Centralized Fuel/Retail Integrated': 'background-color: #E1B97C',
+    'Centralized Automaker-Backed': 'background-color: #C08D87',
+    'Non-Centralized Site-Host': 'background-color: #6C8C78',
+    'Centralized Utility-Backed': 'background-color: #9BBBE6',
+    'Non-Networked': 'background-color: #A0A9AB',
+}
+legend_labels = {
+    'Centralized Fuel/Retail Integrated': '🟨 Centralized Fuel/Retail Integrated',
+    'Centralized Automaker-Backed': '🟫 Centralized Automaker-Backed',
+    'Centralized Utility-Backed': '🟦 Centralized Utility-Backed',
+    'Non-Centralized Site-Host': '🟩 Non-Centralized Site-Host',
+    'Non-Networked': '⬜️ Non-Networked'
+}
+
+# Descriptions for each operator bucket
+bucket_descriptions = {
+    "Centralized Utility-Backed": "Operated by or in partnership with utilities, offering slow and/or fast charging.",
+    "Centralized Automaker-Backed": "Backed by automakers, focused on slow and/or fast charging along travel corridors.",
+    "Centralized Fuel/Retail Integrated": "Installed at major fuel stations or retail sites to serve customers on the go, primarly offerring Level 3 fast charging.",
+    "Non-Centralized Site-Host": "Owned by individual businesses (e.g., restaurants, hotels) or municipalities that use hardware and software platforms like FLO or ChargePoint. Pricing and service are typically managed locally."
+}
+
+LEVEL_NAMES = {'L2': 'Level 2', 'L3': 'Level 3'}
+
+
+def highlight_by_bucket(row):
+    bucket = standardized_bucket_map.get(row['Network'], 'Non-Networked')
+    return [bucket_colors.get(bucket, '')] * len(row)
+
+
+# --- Utility functions ---
+def is_all_non_centralized(df):
+    non_centralized_set = {'Non-Centralized Site-Host', 'Non-Networked'}
+    buckets = [standardized_bucket_map.get(net, 'Non-Networked') for net in df['Network'].unique()]
+    return set(buckets).issubset(non_centralized_set)
+
+
+def get_used_buckets(df):
+    return sorted(set(standardized_bucket_map.get(n, 'Non-Networked') for n in df['Network'].unique()))
+
+
+# Shared styling: centered, wrapping header and body cells. Plain HTML with a static class instead of
+# pandas Styler, which imports matplotlib (kept off the cold path of the client chart backend)
+TABLE_CLASS = "pricing-table"
+TABLE_STYLE = f"""<style type="text/css">
+.{TABLE_CLASS} th {{
+  text-align: center;
+  vertical-align: middle;
+  white-space: normal;
+}}
+.{TABLE_CLASS} td {{
+  text-align: center;
+  vertical-align: middle;
+  white-space: normal;
+  word-break: break-word;
+}}
+</style>
+"""
+
+
+def style_table(df) -> str:
+    # Rows highlighted by operator bucket, index hidden; cell values are inserted as-is (no escaping)
+    header = "".join(f"<th>{col}</th>" for col in df.columns)
+    rows = []
+    for _, row in df.iterrows():
+        cells = "".join(f'<td style="{css}">{value}</td>' if css else f"<td>{value}</td>"
+                        for css, value in zip(highlight_by_bucket(row), row))
+        rows.append(f"    <tr>{cells}</tr>")
+    body = "\n".join(rows)
+    return (f'{TABLE_STYLE}<table class="{TABLE_CLASS}" style="width:100%; table-layout:fixed">\n'
+            f"  <thead>\n    <tr>{header}</tr>\n  </thead>\n  <tbody>\n{body}\n  </tbody>\n</table>\n")
+
+
+# --- HTML/markdown fragments of one province's page ---
+def generate_station_summary(cube, province_code, province_name) -> str:
+    total_ports = int(province_slice(cube, province_code)['ports'].sum())
+    l2 = province_slice(cube, province_code, 'L2_port')['ports'].sum()
+    l3 = province_slice(cube, province_code, 'L3_port')['ports'].sum()
+
+    return f"""
+    <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
+    <b>{province_name} Charging Ports Summary:</b><br>
+    🔌 Total charging ports: {total_ports:,}<br>
+    - Level 2 ports: {int(l2):,}<br>
+    - Level 3 ports: {int(l3):,}<br>
+    - Proportion of Level 2 (%): {l2 / total_ports * 100:.1f}%
+    </div>
+    """
+
+
+def generate_province_bucket_text(cube: dict, province_code: str, province_name: str) -> str:
+    # Get available buckets and associated networks in this province
+    networks_by_bucket = province_slice(cube, province_code).index.to_frame(index=False)
+    available_buckets = networks_by_bucket.groupby('Operator_Bucket', observed=True, sort=True)['EV Network'].unique().to_dict()
+
+    # Compose text
+    text_output = []
+    for bucket, networks in available_buckets.items():
+        if bucket in bucket_descriptions:
+            networks_list = sorted(set(networks))
+            description = f"**{bucket}**: {bucket_descriptions[bucket]} In {province_name}, this includes: {', '.join(networks_list)}."
+            text_output.append(description)
+
+    return "\n\n".join(text_output)
+
+
+def generate_operator_type_interpretation(cube: dict, province: str, level: str, province_name: str):
+    # level = 'L2_port' or 'L3_port'; None when the province has no ports of that level (nothing is shown)
+    centralized_types = [
+        'Centralized Fuel/Retail Integrated',
+        'Centralized Automaker-Backed',
+        'Centralized Utility-Backed'
+    ]
+    non_centralized_types = ['Non-Centralized Site-Host', 'Non-Networked']
+
+    bucket_counts = bucket_totals(cube, province, level)
+    bucket_summary = (bucket_counts / bucket_counts.sum()).sort_values(ascending=False, kind='stable')
+
+    if bucket_summary.empty:
+        return None
+
+    dominant_type = bucket_summary.idxmax()
+    dominant_percent = round(bucket_summary.max() * 100)
+    centralized_share = round(bucket_summary[bucket_summary.index.isin(centralized_types)].sum() * 100)
+    non_centralized_share = round(bucket_summary[bucket_summary.index.isin(non_centralized_types)].sum() * 100)
+
+    # Extract level prefix (e.g., "L2" or "L3")
+    level_prefix = level.split('_')[0]
+
+    return f"""
+    <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
+    <b>Operator Insights for {province_name} — {level_prefix} Ports:</b><br>
+    - Most common operator type: <b>{dominant_type}</b> ({dominant_percent}% of {level_prefix} ports)<br>
+    - <b>{centralized_share}%</b> are managed by centralized networks with consistent pricing and maintenance<br>
+    - <b>{non_centralized_share}%</b> are non-centralized (owned and priced independently by site hosts)
+    </div>
+    """
+
+
+def generate_pricing_section(table, level):
+    # Legend blocks (one per bucket column) and the styled table, or the site-host notice when there is
+    # no centralized network to list
+    legend = [f"<div style='{bucket_colors.get(bucket, '')}; padding: 6px; border-radius: 4px; text-align:center;'>"
+              f"{legend_labels.get(bucket, bucket)}</div>" for bucket in get_used_buckets(table)]
+
+    if table.empty or is_all_non_centralized(table):
+        body = f"""
+        <div style="background-color:#f0f2f6; padding:10px; border-radius:8px">
+        <b>All {LEVEL_NAMES[level]} stations in this province are operated by individual site hosts.</b><br>
+        These use EVSE provider software (like FLO or ChargePoint) under a non-centralized pricing model.
+        </div>
+        """
+    else:
+        body = style_table(table)
+    return {'legend': legend, 'body': body}
+
+
+def render_province_fragments(cube, pricing_store, province_code, province_name) -> dict:
+    """
+    Every data-dependent HTML/markdown block of one province's page, as strings: the port summary box,
+    the operator bucket text, the operator insights per port level and the pricing legend and table per
+    level. The table HTML is built only here, never on a rerun that serves the stored strings.
+    """
+    return {
+        'summary': generate_station_summary(cube, province_code, province_name),
+        'bucket_text': generate_province_bucket_text(cube, province_code, province_name),
+        'insights': {level_column: generate_operator_type_interpretation(cube, province_code, level_column, province_name)
+                     for level_column in LEVEL_COLUMNS.values()},
+        'pricing': {level: generate_pricing_section(get_filtered_table_by_level(province_code, pricing_store, level, cube), level)
+                    for level in LEVEL_COLUMNS},
+    }
+
+
+def render_page_fragments(cube, pricing_store, provinces) -> dict:
+    # provinces: {province code: full name}; returns {province code: fragments}
+    return {code: render_province_fragments(cube, pricing_store, code, name) for code, name in provinces.items()}
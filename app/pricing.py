@@ -0,0 +1,248 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from charging_data import province_map
+from province_cube import province_slice
+
+PRICING_NETWORKS_FILE = "Pricing_data_networks.csv"
+LEVEL_PRICING_FILES = {'L2': "L2_pricing.csv", 'L3': "L3_pricing.csv"}
+LEVEL_COLUMNS = {'L2': 'L2_port', 'L3': 'L3_port'}
+
+# Province headers in the per-level pricing files that differ from the province_map spelling
+PROVINCE_COLUMN_ALIASES = {'Newfounland and Labrador': 'Newfoundland and Labrador'}
+
+# Columns shown in the pricing table of each level, in display order
+PRICING_TABLE_COLUMNS = {
+    'L2': ["Network", "Station Power Level Range (kW)", "Pricing Approach",
+           "Pricing Range", "Network App and roaming partners"],
+    'L3': ["Network", "Station Power Level Range (kW)", "Pricing Approach",
+           "Pricing Range", "Idle Fees Applied", "Network App and roaming partners"],
+}
+
+# Friendly missing text (handle both NaN and explicit "N/A")
+MISSING_TEXT = "Not available"
+
+# Province-specific corrections to Pricing_data_networks.csv. For each network the first rule whose
+# provinces contain the province applies (provinces=None matches every province); it sets the listed
+# columns on that network's rows for both levels.
+PRICING_OVERRIDES = [
+    {'network': 'Tesla', 'provinces': {'NB', 'PE'},  # NS not sure
+     'values': {'kWh Based Pricing': 'No', 'Time Based Pricing': 'Yes', 'Tiered Pricing for L3': 'Yes',
+                'Pricing Approach': 'Time-based'}},
+    {'network': 'Tesla', 'provinces': None,
+     'values': {'kWh Based Pricing': 'Yes', 'Time Based Pricing': 'No', 'Tiered Pricing for L3': 'No',
+                'Pricing Approach': 'Energy-based'}},
+    {'network': 'Shell Recharge', 'provinces': {'MB'},
+     'values': {'kWh Based Pricing': 'No', 'Time Based Pricing': 'Yes'}},
+    {'network': 'Shell Recharge', 'provinces': None,
+     'values': {'kWh Based Pricing': 'Yes', 'Time Based Pricing': 'No'}},
+]
+
+
+def override_values(network, province, rules=PRICING_OVERRIDES):
+    for rule in rules:
+        if rule['network'] == network and (rule['provinces'] is None or province in rule['provinces']):
+            return rule['values']
+    return {}
+
+
+def _display(value):
+    if value is None or value == "N/A" or (isinstance(value, float) and value != value):
+        return MISSING_TEXT
+    return value
+
+
+def read_level_pricing(path):
+    # Network x province-code table of the free-text price ranges in one per-level pricing file
+    level_pricing = pd.read_csv(path).set_index("Network")
+    level_pricing = level_pricing.rename(columns=PROVINCE_COLUMN_ALIASES)
+    return level_pricing.rename(columns=province_map)
+
+
+class PricingStore:
+    """
+    Every pricing table row the app can show, compiled once: the display values for each
+    (network, province, level) with overrides applied and the price range filled in, plus the
+    networks of each level in Pricing_data_networks.csv order.
+    """
+
+    def __init__(self, rows, networks_by_level):
+        self.rows = rows  # (network, province code, level) -> tuple of PRICING_TABLE_COLUMNS[level] values
+        self.networks_by_level = networks_by_level  # level -> [network, ...] in file order
+
+    def table(self, province, level, active_networks) -> pd.DataFrame:
+        # The level's pricing table for the networks active in the province: dictionary lookups, no I/O
+        active = set(active_networks)
+        records = [self.rows[(network, province, level)]
+                   for network in self.networks_by_level.get(level, []) if network in active]
+        return pd.DataFrame.from_records(records, columns=PRICING_TABLE_COLUMNS[level])
+
+
+def compile_pricing_store(directory=".") -> PricingStore:
+    networks = pd.read_csv(os.path.join(directory, PRICING_NETWORKS_FILE), encoding='ISO-8859-1')
+    level_pricing = {level: read_level_pricing(os.path.join(directory, file_name))
+                     for level, file_name in LEVEL_PRICING_FILES.items()}
+
+    rows = {}
+    networks_by_level = {}
+    for record in networks.to_dict('records'):
+        network, level = record['Network'], record['Charging station level']
+        if level not in PRICING_TABLE_COLUMNS:
+            continue
+        networks_by_level.setdefault(level, []).append(network)
+        price_ranges = level_pricing[level]
+        for province in province_map.values():
+            values = {**record, **override_values(network, province)}
+            if network in price_ranges.index and province in price_ranges.columns:
+                values['Pricing Range'] = price_ranges.at[network, province]
+            else:
+                values['Pricing Range'] = "N/A"
+            rows[(network, province, level)] = tuple(_display(values[col]) for col in PRICING_TABLE_COLUMNS[level])
+    return PricingStore(rows, networks_by_level)
+
+
+def pricing_source_files(directory="."):
+    return [os.path.join(directory, PRICING_NETWORKS_FILE)] + \
+        [os.path.join(directory, file_name) for file_name in LEVEL_PRICING_FILES.values()]
+
+
+# --- Pricing table of the centralized networks active in a province ---
+def get_active_networks_by_province_and_level(province_acronym, cube, level_column):
+    df = province_slice(cube, province_acronym, level_column)
+    return df['Clean_Network_Name'].dropna().unique().tolist()
+
+
+def get_filtered_table_by_level(province_acronym, store: PricingStore, level, cube) -> pd.DataFrame:
+    active_networks = get_active_networks_by_province_and_level(province_acronym, cube, LEVEL_COLUMNS[level])
+    return store.table(province_acronym, level, active_networks)
+
+
+# --- Numeric price model parsed from the per-level pricing files ---
+# Units a price is quoted in; "flat" is a per-session fee (also used for "Free")
+PRICE_UNITS = ('kWh', 'minute', 'hour', 'flat')
+# "priced": low/high hold the range; "free": both 0; "not_offered": the file says X;
+# "unknown": N/A, blank or text that does not parse
+PRICE_AVAILABILITY = ('priced', 'free', 'not_offered', 'unknown')
+
+PRICE_PATTERN = re.compile(
+    r"^(?P<up_to>up to\s+)?\$(?P<low>\d+(?:\.\d+)?)(?:\s*-\s*\$(?P<high>\d+(?:\.\d+)?))?"
+    r"\s+per\s+(?P<unit>kwh|minute|hour|session)$", re.IGNORECASE)
+PRICE_UNIT_ALIASES = {'kwh': 'kWh', 'minute': 'minute', 'hour': 'hour', 'session': 'flat'}
+
+
+def parse_price(text):
+    """
+    (low, high, unit, availability) of one pricing cell: "$0.6 - $0.7 per kWh" -> (0.6, 0.7, 'kWh',
+    'priced'), "Up to $3 per hour" -> (0.0, 3.0, 'hour', 'priced'), "Free" -> (0.0, 0.0, 'flat', 'free'),
+    "X" -> not offered; N/A, NaN and anything unrecognised -> unknown. Prices are NaN unless priced or free.
+    """
+    if not isinstance(text, str):
+        return np.nan, np.nan, None, 'unknown'
+    text = text.strip()
+    if text.lower() == 'free':
+        return 0.0, 0.0, 'flat', 'free'
+    if text.upper() == 'X':
+        return np.nan, np.nan, None, 'not_offered'
+    match = PRICE_PATTERN.match(text)
+    if match is None:
+        return np.nan, np.nan, None, 'unknown'
+    low = float(match['low'])
+    high = float(match['high']) if match['high'] else low
+    if match['up_to']:
+        low, high = 0.0, low
+    return low, high, PRICE_UNIT_ALIASES[match['unit'].lower()], 'priced'
+
+
+class PriceModel:
+    """
+    The per-level pricing files as dense arrays indexed [level, province, network]: low/high price
+    (float64, NaN when there is no price), unit and availability codes (int8 positions in PRICE_UNITS
+    and PRICE_AVAILABILITY; unit is -1 when there is no price).
+    """
+
+    def __init__(self, levels, provinces, networks, low, high, unit, availability):
+        self.levels = list(levels)
+        self.provinces = list(provinces)
+        self.networks = list(networks)
+        self.low = low
+        self.high = high
+        self.unit = unit
+        self.availability = availability
+        self._level_index = pd.Index(self.levels)
+        self._province_index = pd.Index(self.provinces)
+
+    def to_frame(self) -> pd.DataFrame:
+        # Long typed table: one row per (level, province, network)
+        index = pd.MultiIndex.from_product([self.levels, self.provinces, self.networks],
+                                           names=['Level', 'Province', 'Network'])
+        return pd.DataFrame({
+            'Min Price': self.low.ravel(),
+            'Max Price': self.high.ravel(),
+            'Unit': pd.Categorical.from_codes(self.unit.ravel(), categories=PRICE_UNITS),
+            'Availability': pd.Categorical.from_codes(self.availability.ravel(), categories=PRICE_AVAILABILITY),
+        }, index=index).reset_index()
+
+    @staticmethod
+    def _positions(index, values, what):
+        positions = index.get_indexer(values)
+        if (positions < 0).any():
+            unknown = sorted(set(values[positions < 0].tolist()))
+            raise ValueError(f"Unknown {what}: {', '.join(map(str, unknown))}")
+        return positions
+
+    def estimate(self, kwh, minutes, province, level):
+        """
+        Min and max cost of a batch of sessions at every network: kwh delivered and minutes connected
+        (arrays of length S, or scalars), province codes and levels ('L2'/'L3', arrays or a single value).
+        Returns (low, high), each an (S, len(networks)) float array; NaN where the network has no known
+        price for that province and level. Hourly prices bill minutes / 60, flat fees once per session.
+        """
+        kwh, minutes = np.broadcast_arrays(np.asarray(kwh, dtype=float).ravel(),
+                                           np.asarray(minutes, dtype=float).ravel())
+        n_sessions = len(kwh)
+        province = np.broadcast_to(np.asarray(province, dtype=object).ravel(), (n_sessions,))
+        level = np.broadcast_to(np.asarray(level, dtype=object).ravel(), (n_sessions,))
+        level_pos = self._positions(self._level_index, level, "level")
+        province_pos = self._positions(self._province_index, province, "province")
+
+        # Billed quantity per session in each unit, in PRICE_UNITS order; the extra last column is
+        # picked by unit -1 (no price) and keeps the NaN of those cells
+        quantity = np.column_stack([kwh, minutes, minutes / 60, np.ones(n_sessions), np.full(n_sessions, np.nan)])
+        billed = np.take_along_axis(quantity, self.unit[level_pos, province_pos].astype(np.intp), axis=1)
+        return self.low[level_pos, province_pos] * billed, self.high[level_pos, province_pos] * billed
+
+
+def compile_price_model(directory=".") -> PriceModel:
+    level_pricing = {level: read_level_pricing(os.path.join(directory, file_name))
+                     for level, file_name in LEVEL_PRICING_FILES.items()}
+    levels = list(LEVEL_PRICING_FILES)
+    provinces = list(province_map.values())
+    networks = list(dict.fromkeys(network for table in level_pricing.values() for network in table.index))
+    network_pos = {network: k for k, network in enumerate(networks)}
+
+    shape = (len(levels), len(provinces), len(networks))
+    low = np.full(shape, np.nan)
+    high = np.full(shape, np.nan)
+    unit = np.full(shape, -1, dtype=np.int8)
+    availability = np.full(shape, PRICE_AVAILABILITY.index('unknown'), dtype=np.int8)
+
+    # Each distinct cell text is parsed once
+    parsed = {}
+    for i, level in enumerate(levels):
+        table = level_pricing[level]
+        for j, province in enumerate(provinces):
+            if province not in table.columns:
+                continue
+            for network, text in table[province].items():
+                key = text if isinstance(text, str) else None
+                if key not in parsed:
+                    parsed[key] = parse_price(key)
+                cell_low, cell_high, cell_unit, cell_availability = parsed[key]
+                k = network_pos[network]
+                low[i, j, k], high[i, j, k] = cell_low, cell_high
+                unit[i, j, k] = -1 if cell_unit is None else PRICE_UNITS.index(cell_unit)
+                availability[i, j, k] = PRICE_AVAILABILITY.index(cell_availability)
+    return PriceModel(levels, provinces, networks, low, high, unit, availability)
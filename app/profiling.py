@@ -0,0 +1,117 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+HISTOGRAM_EDGES_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def current_rss():
+    # Resident set size in bytes from /proc (one small read, no psutil/tracemalloc); None where unavailable
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class StageTimings:
+    """
+    Thread-safe rolling record of how long each named stage took (and how much the process RSS moved
+    while it ran). Only the last `window` samples per stage are kept, so memory stays bounded on a
+    long-running server; summary() turns them into percentiles and a fixed-bucket histogram.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = {}  # stage -> deque of (seconds, rss delta bytes or None)
+        self._totals = {}  # stage -> calls since start, including the ones rolled out of the window
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, mem_delta=None):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append((seconds, mem_delta))
+            self._totals[name] = self._totals.get(name, 0) + 1
+
+    @contextmanager
+    def stage(self, name):
+        rss = current_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            after = current_rss()
+            self.record(name, seconds, None if rss is None or after is None else after - rss)
+
+    def timed(self, name=None):
+        # Decorator form of stage(); the stage defaults to the function name
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+
+        stages = {}
+        for name, samples in sorted(snapshot.items()):
+            durations_ms = sorted(seconds * 1e3 for seconds, _ in samples)
+            mem_deltas = [delta for _, delta in samples if delta is not None]
+            histogram = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+            for ms in durations_ms:
+                histogram[next((i for i, edge in enumerate(HISTOGRAM_EDGES_MS) if ms <= edge),
+                               len(HISTOGRAM_EDGES_MS))] += 1
+            stages[name] = {
+                "calls": totals[name],
+                "window": len(durations_ms),
+                "last_ms": round(samples[-1][0] * 1e3, 3),
+                "mean_ms": round(sum(durations_ms) / len(durations_ms), 3),
+                "p50_ms": round(_percentile(durations_ms, 0.50), 3),
+                "p90_ms": round(_percentile(durations_ms, 0.90), 3),
+                "p99_ms": round(_percentile(durations_ms, 0.99), 3),
+                "max_ms": round(durations_ms[-1], 3),
+                "mem_delta_mean_kb": round(sum(mem_deltas) / len(mem_deltas) / 1024, 1) if mem_deltas else None,
+                "mem_delta_max_kb": round(max(mem_deltas) / 1024, 1) if mem_deltas else None,
+                "histogram": histogram,
+            }
+        return {"histogram_edges_ms": HISTOGRAM_EDGES_MS, "rss_bytes": current_rss(), "stages": stages}
+
+    def to_json(self, **extra):
+        # extra: other process-wide counters (e.g. cache stats) reported next to the stages
+        return json.dumps({**self.summary(), **extra}, indent=1)
+
+    def dump(self, path, **extra):
+        # Written aside and swapped in, so a scraper never reads a half-written file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_json(**extra))
+        os.replace(tmp_path, path)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
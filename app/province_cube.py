@@ -0,0 +1,52 @@
+import pandas as pd
+
+from charging_data import CLEAN_NETWORK_DTYPE, map_network_codes, network_name_mapping
+
+# 'All' counts every port in the province; the other levels are the port flag columns
+LEVELS = ['All', 'L2_port', 'L3_port']
+CUBE_COLUMNS = ['ports', 'share', 'Clean_Network_Name']
+
+
+# --- Aggregate cube: province x level x operator bucket x network ---
+def build_province_cube(charging_ports: pd.DataFrame) -> dict:
+    """
+    Aggregates the processed table in a single group-by pass and returns a dict keyed by
+    (province, level). Each value is a small frame indexed by (Operator_Bucket, EV Network)
+    holding the port count, its share of the province/level total and the clean network name.
+    """
+    counts = charging_ports.groupby(
+        ['State', 'Operator_Bucket', 'EV Network'], observed=True, dropna=False, sort=True
+    )[['ports', 'L2_port', 'L3_port']].sum()
+    counts = counts.rename(columns={'ports': 'All'}).reset_index()
+
+    # Long format, one row per (province, level, bucket, network) with at least one port
+    cube = counts.melt(id_vars=['State', 'Operator_Bucket', 'EV Network'], value_vars=LEVELS,
+                       var_name='level', value_name='ports')
+    cube = cube[cube['ports'] > 0].astype({'ports': 'int64'})
+    cube = cube.dropna(subset=['State'])
+    cube['share'] = cube['ports'] / cube.groupby(['State', 'level'], observed=True)['ports'].transform('sum')
+    if isinstance(cube['EV Network'].dtype, pd.CategoricalDtype):
+        cube['Clean_Network_Name'] = map_network_codes(cube['EV Network'], network_name_mapping, CLEAN_NETWORK_DTYPE)
+    else:
+        cube['Clean_Network_Name'] = cube['EV Network'].map(network_name_mapping)
+
+    return {
+        (str(province), level): frame.set_index(['Operator_Bucket', 'EV Network'])[CUBE_COLUMNS]
+        for (province, level), frame in cube.groupby(['State', 'level'], observed=True, sort=True)
+    }
+
+
+def province_slice(cube: dict, province, level='All') -> pd.DataFrame:
+    # Empty frame (same columns) for provinces or levels without ports
+    frame = cube.get((province, level))
+    if frame is None:
+        return pd.DataFrame({'ports': pd.Series(dtype='int64'), 'share': pd.Series(dtype='float64'),
+                             'Clean_Network_Name': pd.Series(dtype=object)},
+                            index=pd.MultiIndex.from_tuples([], names=['Operator_Bucket', 'EV Network']))
+    return frame
+
+
+def bucket_totals(cube: dict, province, level='All') -> pd.Series:
+    # Port count per operator bucket, in bucket name order
+    frame = province_slice(cube, province, level)
+    return frame.groupby(level='Operator_Bucket', observed=True, sort=True)['ports'].sum()
@@ -0,0 +1,186 @@
+import heapq
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Mean Earth radius (IUGG), km
+EARTH_RADIUS_KM = 6371.0088
+
+# Port level filters: rows kept by each (None keeps every station)
+LEVEL_FILTERS = {None: None, 'L2': 'L2_port', 'L3': 'L3_port'}
+
+
+def to_unit_vectors(lat, lon):
+    # Points on the unit sphere: straight-line (chord) distance orders points like great-circle distance
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(np.minimum(np.asarray(km) / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+class KDTree:
+    """
+    Static KD-tree over 3D points, stored as flat arrays: points are reordered so that every node owns
+    the contiguous slice [start[node], end[node]) and each node keeps its bounding box. Nodes split on
+    their widest axis at the median until they hold at most leaf_size points, so leaf scans are one
+    vectorized distance computation.
+    """
+
+    def __init__(self, points, leaf_size=64):
+        points = np.asarray(points, dtype=np.float64)
+        self.order = np.arange(len(points))
+        self.leaf_size = leaf_size
+        start, end, left, right, box_min, box_max = [], [], [], [], [], []
+
+        def add_node(lo, hi):
+            start.append(lo)
+            end.append(hi)
+            left.append(-1)
+            right.append(-1)
+            box = points[self.order[lo:hi]]
+            box_min.append(box.min(axis=0) if hi > lo else np.zeros(3))
+            box_max.append(box.max(axis=0) if hi > lo else np.zeros(3))
+            return len(start) - 1
+
+        stack = [add_node(0, len(points))]
+        while stack:
+            node = stack.pop()
+            lo, hi = start[node], end[node]
+            if hi - lo <= leaf_size:
+                continue
+            axis = int(np.argmax(box_max[node] - box_min[node]))
+            mid = (lo + hi) // 2
+            members = self.order[lo:hi]
+            self.order[lo:hi] = members[np.argpartition(points[members, axis], mid - lo)]
+            left[node], right[node] = add_node(lo, mid), add_node(mid, hi)
+            stack.extend((left[node], right[node]))
+
+        self.points = points[self.order]
+        self.start, self.end = np.array(start), np.array(end)
+        self.left, self.right = np.array(left), np.array(right)
+        self.box_min, self.box_max = np.array(box_min), np.array(box_max)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _min_dist2(self, node, point):
+        gap = np.maximum(np.maximum(self.box_min[node] - point, point - self.box_max[node]), 0.0)
+        return float(gap @ gap)
+
+    def _leaf_dist2(self, node, point):
+        diff = self.points[self.start[node]:self.end[node]] - point
+        return np.einsum('ij,ij->i', diff, diff)
+
+    def nearest(self, point, k):
+        # (positions in the input points, chord distances) of the k nearest points, nearest first
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        best_d2, best_pos = np.empty(0), np.empty(0, dtype=np.intp)
+        bound = np.inf
+        heap = [(0.0, 0)]
+        while heap:
+            node_d2, node = heapq.heappop(heap)
+            if node_d2 > bound:
+                break
+            if self.left[node] < 0:
+                best_d2 = np.concatenate([best_d2, self._leaf_dist2(node, point)])
+                best_pos = np.concatenate([best_pos, np.arange(self.start[node], self.end[node])])
+                if len(best_d2) > k:
+                    keep = np.argpartition(best_d2, k - 1)[:k]
+                    best_d2, best_pos = best_d2[keep], best_pos[keep]
+                if len(best_d2) == k:
+                    bound = best_d2.max()
+                continue
+            for child in (self.left[node], self.right[node]):
+                child_d2 = self._min_dist2(child, point)
+                if child_d2 <= bound:
+                    heapq.heappush(heap, (child_d2, child))
+        ranked = np.argsort(best_d2, kind='stable')
+        return self.order[best_pos[ranked]], np.sqrt(best_d2[ranked])
+
+    def within(self, point, radius):
+        # (positions, chord distances) of every point within the chord radius, nearest first
+        radius2 = radius * radius
+        found_d2, found_pos = [], []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._min_dist2(node, point) > radius2:
+                continue
+            if self.left[node] >= 0:
+                stack.extend((self.left[node], self.right[node]))
+                continue
+            d2 = self._leaf_dist2(node, point)
+            hit = d2 <= radius2
+            found_d2.append(d2[hit])
+            found_pos.append(np.arange(self.start[node], self.end[node])[hit])
+        if not found_d2:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        d2, pos = np.concatenate(found_d2), np.concatenate(found_pos)
+        ranked = np.argsort(d2, kind='stable')
+        return self.order[pos[ranked]], np.sqrt(d2[ranked])
+
+
+class StationIndex:
+    """
+    Nearest-station and radius queries over the processed stations (Latitude/Longitude with their
+    L2_port/L3_port, EV Network and Operator_Bucket). A KD-tree is built per (level, networks) filter
+    the first time that filter is queried and reused afterwards, so every query only walks the
+    stations that can match. Results are row positions into the frame plus great-circle distances.
+    """
+
+    def __init__(self, stations: pd.DataFrame, leaf_size=64):
+        located = stations['Latitude'].notna().to_numpy() & stations['Longitude'].notna().to_numpy()
+        self.stations = stations
+        self.leaf_size = leaf_size
+        self._rows = np.flatnonzero(located)
+        self._vectors = to_unit_vectors(stations['Latitude'].to_numpy()[located],
+                                        stations['Longitude'].to_numpy()[located])
+        self._trees = {}  # (level, frozenset of networks or None) -> (rows, KDTree)
+        self._lock = threading.Lock()
+
+    def _tree(self, level, networks):
+        if level not in LEVEL_FILTERS:
+            raise ValueError(f"Unknown level {level!r}; expected one of {sorted(filter(None, LEVEL_FILTERS))}")
+        key = (level, None if networks is None else frozenset(networks))
+        with self._lock:
+            entry = self._trees.get(key)
+        if entry is not None:
+            return entry
+
+        keep = np.ones(len(self._rows), dtype=bool)
+        if LEVEL_FILTERS[level] is not None:
+            keep &= self.stations[LEVEL_FILTERS[level]].to_numpy()[self._rows] > 0
+        if networks is not None:
+            keep &= self.stations['EV Network'].isin(key[1]).to_numpy()[self._rows]
+        entry = (self._rows[keep], KDTree(self._vectors[keep], self.leaf_size))
+        with self._lock:
+            return self._trees.setdefault(key, entry)
+
+    def nearest(self, lat, lon, k=5, level=None, networks=None):
+        # (row positions, distances in km) of the k nearest stations matching the filters
+        rows, tree = self._tree(level, networks)
+        positions, chords = tree.nearest(to_unit_vectors(lat, lon), k)
+        return rows[positions], chord_to_km(chords)
+
+    def within(self, lat, lon, radius_km, level=None, networks=None):
+        # (row positions, distances in km) of every matching station within radius_km, nearest first
+        rows, tree = self._tree(level, networks)
+        positions, chords = tree.within(to_unit_vectors(lat, lon), float(km_to_chord(radius_km)))
+        return rows[positions], chord_to_km(chords)
+
+    def frame(self, rows, distances_km, columns=None):
+        # The matching station rows with a distance_km column, in query order
+        result = self.stations.iloc[rows]
+        if columns is not None:
+            result = result[columns]
+        return result.assign(distance_km=distances_km)
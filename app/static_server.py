@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from file_cache import FileContentCache
+
+# Written next to the maps by Additional_Files/download_maps_.py: content hash and compressed variants per file
+MANIFEST_FILE = "manifest.json"
+
+# Preferred first; each maps to the file extension of the precompressed sibling
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+
+def load_manifest(maps_dir):
+    manifest_file = os.path.join(maps_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def versioned_path(entry):
+    # URL path for a manifest entry; the hash query makes it safe to cache forever
+    return f"/maps/{entry['file']}?v={entry['sha256'][:16]}"
+
+
+def choose_encoding(accept_encoding, entry):
+    # Best precompressed variant the client accepts, or (None, "") for the plain file
+    accepted = {token.split(";")[0].strip() for token in (accept_encoding or "").split(",")}
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and encoding in entry.get("variants", {}):
+            return encoding, suffix
+    return None, ""
+
+
+def make_handler(maps_dir, cache):
+    class PrecompressedMapHandler(BaseHTTPRequestHandler):
+        """Serves /maps/<file> from the manifest, sending the precompressed bytes as-is."""
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _serve(self, send_body):
+            url = urlsplit(self.path)
+            name = url.path[len("/maps/"):] if url.path.startswith("/maps/") else None
+            manifest = json.loads(cache.read_text(os.path.join(maps_dir, MANIFEST_FILE)) or "{}")
+            entry = next((e for e in manifest.values() if e["file"] == name), None)
+            if entry is None:
+                self.send_error(404)
+                return
+
+            encoding, suffix = choose_encoding(self.headers.get("Accept-Encoding"), entry)
+            etag = f'"{entry["sha256"][:32]}{"-" + encoding if encoding else ""}"'
+            pinned = parse_qs(url.query).get("v", [""])[0] == entry["sha256"][:16]
+
+            not_modified = self.headers.get("If-None-Match") == etag
+            body = None if not_modified else cache.read_bytes(os.path.join(maps_dir, entry["file"] + suffix))
+            if not not_modified and body is None:
+                self.send_error(404)
+                return
+
+            self.send_response(304 if not_modified else 200)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Cache-Control", IMMUTABLE_CACHE_CONTROL if pinned else REVALIDATE_CACHE_CONTROL)
+            if not_modified:
+                self.end_headers()
+                return
+
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep Streamlit's console readable
+
+    return PrecompressedMapHandler
+
+
+def start_static_server(maps_dir, host="127.0.0.1", port=8502, cache=None):
+    """
+    Starts a background HTTP server for the exported map artifacts and returns it. It binds to
+    loopback by default: expose it to viewers through a reverse proxy, not directly.
+    Meant to be created once per process (st.cache_resource in app.py).
+    """
+    cache = cache or FileContentCache(max_bytes=64 * 1024 * 1024)
+    server = ThreadingHTTPServer((host, port), make_handler(os.path.abspath(maps_dir), cache))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="map-static-server", daemon=True).start()
+    return server
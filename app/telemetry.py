@@ -0,0 +1,178 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# --- Sinks: receive a list of event dicts from the background thread ---
+class StreamSink:
+    # One JSON line per event on a text stream (stdout by default); for local runs and offline tests
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, events):
+        self.stream.write("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events))
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class FileSink(StreamSink):
+    # Appends JSON lines to a local file
+    def __init__(self, path):
+        super().__init__(open(path, "a", encoding="utf-8"))
+
+    def close(self):
+        self.stream.close()
+
+
+class AzureSink:
+    """
+    Forwards events to Application Insights through a single AzureLogHandler, created lazily on the
+    first batch (so opencensus is never imported on the request path) and never attached to a logger.
+    """
+
+    def __init__(self, connection_string):
+        self.connection_string = connection_string
+        self._handler = None
+
+    def send(self, events):
+        if self._handler is None:
+            from opencensus.ext.azure.log_exporter import AzureLogHandler
+
+            self._handler = AzureLogHandler(connection_string=self.connection_string)
+        for event in events:
+            self._handler.handle(logging.makeLogRecord({
+                "name": "chargecompare.telemetry", "levelno": logging.INFO, "levelname": "INFO",
+                "msg": event["message"], "created": event["created"],
+                "custom_dimensions": {"event": event["name"], **event["properties"]},
+            }))
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+
+
+class NullSink:
+    def send(self, events):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_sink(spec, connection_string=None):
+    # "azure", "stdout", "file:<path>" or "off"
+    if spec == "off":
+        return NullSink()
+    if spec == "stdout":
+        return StreamSink()
+    if spec.startswith("file:"):
+        return FileSink(spec[len("file:"):])
+    return AzureSink(connection_string)
+
+
+# --- Queue and background batcher ---
+class Telemetry:
+    """
+    Non-blocking event exporter. emit() only does a put_nowait on a bounded queue (events are counted
+    and dropped when it is full); a daemon thread drains it in batches of up to batch_size events, or
+    whatever arrived within flush_interval seconds, and hands them to the sink. Sink errors are counted,
+    never raised into the app.
+    """
+
+    def __init__(self, sink, max_queue=1000, batch_size=50, flush_interval=5.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.emitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-batcher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, name, message, **properties):
+        event = {
+            "name": name,
+            "message": message,
+            "created": time.time(),
+            "time": datetime.now(timezone.utc).isoformat(),
+            "properties": properties,
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.emitted += 1
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or (self._stopping.is_set() and self._queue.empty()):
+                break
+            try:
+                event = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if event is None:  # wake-up sent by close()
+                break
+            batch.append(event)
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self.sink.send(batch)
+            except Exception:
+                with self._lock:
+                    self.failed += len(batch)
+                continue
+            with self._lock:
+                self.sent += len(batch)
+                self.batches += 1
+
+    def close(self, timeout=2.0):
+        # Drains what is queued (bounded by timeout) and releases the sink; safe to call twice
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        try:
+            self.sink.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "emitted": self.emitted,
+                "sent": self.sent,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
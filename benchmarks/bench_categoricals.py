@@ -0,0 +1,88 @@
+"""
+Compares the processed table with plain object-string label columns against the fixed-category
+representation built by charging_data (State, EV Network, Operator_Bucket, Clean_Network_Name):
+memory, the network -> bucket/clean-name mapping, a province equality filter and a group-by.
+
+    python benchmarks/bench_categoricals.py --rows 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from synthetic import make_stations_frame  # also puts app/ on sys.path
+from charging_data import (
+    BUCKET_DTYPE, CLEAN_NETWORK_DTYPE, PROVINCE_DTYPE, flag_charging_ports, map_network_codes,
+    network_bucket_map, network_dtype, network_name_mapping,
+)
+
+LABEL_COLUMNS = ['State', 'EV Network', 'Operator_Bucket', 'Clean_Network_Name']
+
+
+def object_frame(raw):
+    # The original representation: every label is a Python string per row
+    frame = flag_charging_ports(raw.copy())
+    frame['Operator_Bucket'] = frame['EV Network'].map(network_bucket_map).fillna('Non-Networked')
+    frame['Clean_Network_Name'] = frame['EV Network'].map(network_name_mapping)
+    return frame
+
+
+def categorical_frame(raw):
+    frame = raw.copy()
+    frame['State'] = frame['State'].astype(PROVINCE_DTYPE)
+    frame['EV Network'] = frame['EV Network'].astype(network_dtype(frame['EV Network'].dropna().unique()))
+    frame = flag_charging_ports(frame)
+    frame['Operator_Bucket'] = map_network_codes(frame['EV Network'], network_bucket_map, BUCKET_DTYPE,
+                                                 default='Non-Networked')
+    frame['Clean_Network_Name'] = map_network_codes(frame['EV Network'], network_name_mapping, CLEAN_NETWORK_DTYPE)
+    return frame
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(frame, repeat):
+    return {
+        "label memory (MB)": frame[LABEL_COLUMNS].memory_usage(deep=True).sum() / 1e6,
+        "bucket mapping (ms)": 1e3 * best_of(
+            lambda: frame['EV Network'].map(network_bucket_map) if frame['EV Network'].dtype == object
+            else map_network_codes(frame['EV Network'], network_bucket_map, BUCKET_DTYPE, default='Non-Networked'),
+            repeat),
+        "State == 'ON' (ms)": 1e3 * best_of(lambda: frame[frame['State'] == 'ON'], repeat),
+        "Operator_Bucket == x (ms)": 1e3 * best_of(
+            lambda: frame[frame['Operator_Bucket'] == 'Centralized Utility-Backed'], repeat),
+        "group-by province x bucket (ms)": 1e3 * best_of(
+            lambda: frame.groupby(['State', 'Operator_Bucket'], observed=True)['ports'].sum(), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = make_stations_frame(args.rows, args.seed)
+    print(f"Synthetic frame: {len(raw):,} rows")
+
+    strings = object_frame(raw)
+    categories = categorical_frame(raw)
+    for col in LABEL_COLUMNS:
+        pd.testing.assert_series_equal(categories[col].astype(object).fillna(''), strings[col].fillna(''))
+    print("Labels identical: yes")
+
+    before, after = measure(strings, args.repeat), measure(categories, args.repeat)
+    print(f"{'':34}{'object':>10}{'category':>10}{'ratio':>8}")
+    for name in before:
+        print(f"{name:34}{before[name]:10.2f}{after[name]:10.2f}{before[name] / after[name]:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
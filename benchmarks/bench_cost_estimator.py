@@ -0,0 +1,78 @@
+"""
+Times the batched charging-cost estimator (pricing.PriceModel.estimate) against a per-session,
+per-network Python loop over the same parsed price model, on random sessions spread across every
+province and both levels, and checks that both give the same costs.
+
+    python benchmarks/bench_cost_estimator.py --sessions 1000,100000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from synthetic import PROVINCES  # also puts app/ on sys.path
+from pricing import PRICE_UNITS, compile_price_model
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def random_sessions(n_sessions, seed):
+    rng = np.random.default_rng(seed)
+    kwh = rng.uniform(5, 80, n_sessions).round(1)
+    minutes = rng.uniform(10, 240, n_sessions).round()
+    province = rng.choice(sorted(PROVINCES), n_sessions)
+    level = rng.choice(["L2", "L3"], n_sessions)
+    return kwh, minutes, province, level
+
+
+def estimate_loop(model, kwh, minutes, province, level):
+    # Reference implementation: one price lookup and unit conversion per (session, network)
+    low = np.full((len(kwh), len(model.networks)), np.nan)
+    high = np.full_like(low, np.nan)
+    for s in range(len(kwh)):
+        i, j = model.levels.index(level[s]), model.provinces.index(province[s])
+        for k in range(len(model.networks)):
+            unit = model.unit[i, j, k]
+            if unit < 0:
+                continue
+            billed = {"kWh": kwh[s], "minute": minutes[s], "hour": minutes[s] / 60, "flat": 1.0}[PRICE_UNITS[unit]]
+            low[s, k], high[s, k] = model.low[i, j, k] * billed, model.high[i, j, k] * billed
+    return low, high
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1000,100000", help="Comma-separated batch sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-loop-sessions", type=int, default=100_000, help="Largest batch the loop runs on")
+    args = parser.parse_args()
+
+    model = compile_price_model(REPO_ROOT)
+    print(f"{len(model.networks)} networks x {len(model.provinces)} provinces x {len(model.levels)} levels")
+    print(f"{'sessions':>10}{'batched ms':>14}{'sessions/s':>16}{'loop ms':>12}{'speedup':>10}")
+    for size in args.sessions.split(","):
+        n_sessions = int(size)
+        sessions = random_sessions(n_sessions, args.seed)
+        batched, (low, high) = best_time(lambda: model.estimate(*sessions), args.repeat)
+        line = f"{n_sessions:10,}{batched * 1e3:14.2f}{n_sessions / batched:16,.0f}"
+        if n_sessions <= args.max_loop_sessions:
+            loop, (loop_low, loop_high) = best_time(lambda: estimate_loop(model, *sessions), 1)
+            assert np.allclose(low, loop_low, equal_nan=True) and np.allclose(high, loop_high, equal_nan=True)
+            line += f"{loop * 1e3:12.1f}{loop / batched:9.0f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Profiles the cold start of the Streamlit app: the first script run in a fresh interpreter, through
+streamlit.testing.v1.AppTest, under python -X importtime. That includes everything the first run
+imports, the st.cache_resource loaders included (data load, chart pre-render, pricing store), not
+just the module-level imports of app/app.py.
+
+The run fails when the first run raises, takes longer than the budget, or loads a heavy package
+outside the backend's allowance (STARTUP_ALLOWED). --json appends each run to a history file to
+track the trend. As a pytest test it runs every chart backend against the default budgets:
+
+    python benchmarks/bench_import_time.py --backend client --repeat 3 --budget-ms 5000
+    CHARGECOMPARE_BENCH_DATA_DIR=/path/to/data python -m pytest benchmarks/bench_import_time.py
+
+The data directory is the working directory of the run: it needs the NREL extract (or its processed
+cache), the pricing CSVs and maps/, as the deployed app does.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_DIR = os.path.join(REPO_ROOT, "app")
+APP_SCRIPT = os.path.join(APP_DIR, "app.py")
+DATA_DIR = os.environ.get("CHARGECOMPARE_BENCH_DATA_DIR", REPO_ROOT)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# Packages too heavy for the cold path, and the ones each chart backend may load on its first run
+HEAVY_PACKAGES = {'matplotlib', 'pyarrow', 'folium', 'streamlit_folium', 'opencensus'}
+STARTUP_ALLOWED = {
+    'client': {'pyarrow'},
+    'matplotlib': {'pyarrow', 'matplotlib'},
+}
+# Default first-run budgets (ms); the matplotlib backend pre-renders every province's charts
+FIRST_RUN_BUDGET_MS = {'client': 10_000, 'matplotlib': 60_000}
+
+# Runs in the fresh interpreter: one first script run, then a JSON line with what it cost
+FIRST_RUN_SOURCE = f"""
+import json, sys, time
+sys.path.insert(0, {APP_DIR!r})
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({APP_SCRIPT!r}, default_timeout=600)
+app.run()
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "exceptions": [exception.message for exception in app.exception],
+    "packages": sorted({{name.split('.')[0] for name in sys.modules}}),
+}}))
+"""
+
+
+def profile_first_run(backend, data_dir=DATA_DIR):
+    """
+    Runs the app once in a fresh interpreter with -X importtime. Returns the child's report (first
+    run seconds, exceptions, top-level packages in sys.modules) plus rows, being (module, self_us,
+    cumulative_us, depth) for every module imported.
+    """
+    env = dict(os.environ, CHARGECOMPARE_CHART_BACKEND=backend, CHARGECOMPARE_TELEMETRY="off")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", FIRST_RUN_SOURCE], cwd=data_dir,
+                            env=env, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    report["rows"] = rows
+    return report
+
+
+def first_run_problems(report, backend, budget_ms):
+    # Why the run fails its budget, as messages; empty when it passes
+    problems = [f"first run raised: {message}" for message in report["exceptions"]]
+    unexpected = sorted((set(report["packages"]) & HEAVY_PACKAGES) - STARTUP_ALLOWED[backend])
+    if unexpected:
+        problems.append(f"heavy packages loaded on the {backend} backend's first run: {', '.join(unexpected)}")
+    if report["seconds"] * 1e3 > budget_ms:
+        problems.append(f"first run took {report['seconds'] * 1e3:.0f} ms > {budget_ms:.0f} ms budget")
+    return problems
+
+
+def has_stations_data(data_dir=DATA_DIR):
+    sys.path.insert(0, APP_DIR)
+    from charging_data import PROCESSED_CACHE_FILE, latest_stations_csv
+
+    return (os.path.exists(latest_stations_csv(data_dir))
+            or os.path.exists(os.path.join(data_dir, PROCESSED_CACHE_FILE)))
+
+
+def test_first_run_budget():
+    import pytest
+
+    if not has_stations_data():
+        pytest.skip(f"no stations extract in {DATA_DIR}; set CHARGECOMPARE_BENCH_DATA_DIR")
+    for backend in STARTUP_ALLOWED:
+        problems = first_run_problems(profile_first_run(backend), backend, FIRST_RUN_BUDGET_MS[backend])
+        assert not problems, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(STARTUP_ALLOWED), default="matplotlib")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Working directory of the app run")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters to run; the fastest one is reported")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail when the first run exceeds this (default: FIRST_RUN_BUDGET_MS of the backend)")
+    parser.add_argument("--json", default=None, help="Append the result to this JSON history file")
+    args = parser.parse_args()
+    budget_ms = args.budget_ms if args.budget_ms is not None else FIRST_RUN_BUDGET_MS[args.backend]
+
+    reports = [profile_first_run(args.backend, args.data_dir) for _ in range(args.repeat)]
+    report = min(reports, key=lambda run: run["seconds"])
+    top_level = [row for row in report["rows"] if row[3] == 0]
+    import_ms = sum(row[2] for row in top_level) / 1e3
+
+    print(f"First run of app/app.py ({args.backend} backend)")
+    print(f"\n{'module':40}{'cumulative ms':>15}{'self ms':>10}")
+    for module, self_us, cumulative_us, _ in sorted(top_level, key=lambda row: -row[2])[:args.top]:
+        print(f"{module:40}{cumulative_us / 1e3:15.1f}{self_us / 1e3:10.1f}")
+    heavy = sorted(set(report["packages"]) & HEAVY_PACKAGES)
+    print(f"\nFirst run: {report['seconds'] * 1e3:.0f} ms, of which imports {import_ms:.0f} ms across "
+          f"{len(report['rows'])} modules (best of {args.repeat})")
+    print(f"Heavy packages loaded: {', '.join(heavy) or 'none'}")
+
+    if args.json:
+        history = []
+        if os.path.exists(args.json):
+            with open(args.json, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        history.append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "backend": args.backend,
+                        "first_run_ms": round(report["seconds"] * 1e3, 1), "import_ms": round(import_ms, 1),
+                        "modules": len(report["rows"]), "heavy": heavy})
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=1)
+
+    problems = first_run_problems(report, args.backend, budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
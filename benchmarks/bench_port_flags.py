@@ -0,0 +1,140 @@
+"""
+Checks that the column-wise port flagging in charging_data.flag_charging_ports produces the same
+flags as the original row-wise DataFrame.apply implementation, and times both. The check covers the
+object-dtype EV Network column and the categorical one with float32 counts that the chunked loader
+feeds it, on synthetic rows and on an edge-case grid (missing networks, zero, missing and multiple
+connector counts). As a pytest test it runs the checks without the timing:
+
+    python benchmarks/bench_port_flags.py --rows 1000000
+    python -m pytest benchmarks/bench_port_flags.py
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_stations_frame  # also puts app/ on sys.path
+from charging_data import STATION_DTYPES, flag_charging_ports, network_dtype
+
+FLAG_COLUMNS = ['ports', 'L2_Tesla', 'L3_Tesla', 'L2_port', 'L3_port',
+                'EV CHAdeMO Connector Count', 'EV CCS Connector Count']
+
+
+# Original row-wise implementation, kept here as the reference
+def flag_charging_ports_rowwise(charging_ports):
+    charging_ports["ports"] = 1
+
+    charging_ports['L2_Tesla'] = charging_ports['EV Network'].apply(lambda x: 1 if 'Tesla Destination' in str(x) else 0)
+    charging_ports['L2_Tesla'] = charging_ports.apply(
+        lambda row: 0 if row.get('EV J1772 Connector Count', 0) == 1 and row['L2_Tesla'] == 1 else row['L2_Tesla'],
+        axis=1
+    )
+
+    charging_ports['L3_Tesla'] = charging_ports.apply(
+        lambda row: 1 if row.get('EV J3400 Connector Count', 0) == 1 and row['L2_Tesla'] == 0 else 0,
+        axis=1
+    )
+
+    DCFC_ports = charging_ports[charging_ports["EV DC Fast Count"] > 0]
+    filtered_df = DCFC_ports[(DCFC_ports['EV CHAdeMO Connector Count'] == 1) & (DCFC_ports['EV CCS Connector Count'] == 1)].copy()
+    filtered_df.loc[:, 'EV CHAdeMO Connector Count'] = 0
+    filtered_df.loc[:, 'EV CCS Connector Count'] = 0
+    charging_ports.loc[filtered_df.index, ['EV CHAdeMO Connector Count', 'EV CCS Connector Count']] = filtered_df[['EV CHAdeMO Connector Count', 'EV CCS Connector Count']]
+    charging_ports.loc[filtered_df.index, 'ChademoCCSsingleuseport'] = 1
+
+    charging_ports["L2_port"] = charging_ports.apply(
+        lambda row: 1 if row.get("EV J1772 Connector Count", 0) > 0 or row.get("L2_Tesla", 0) > 0 else 0,
+        axis=1
+    )
+    charging_ports["L3_port"] = charging_ports.apply(
+        lambda row: 1 if (
+            row.get("EV CCS Connector Count", 0) > 0 or
+            row.get("EV CHAdeMO Connector Count", 0) > 0 or
+            row.get("ChademoCCSsingleuseport", 0) > 0 or
+            row.get("L3_Tesla", 0) > 0
+        ) else 0,
+        axis=1
+    )
+    return charging_ports
+
+
+COUNT_COLUMNS = ['EV J1772 Connector Count', 'EV J3400 Connector Count', 'EV CCS Connector Count',
+                 'EV CHAdeMO Connector Count', 'EV DC Fast Count']
+
+
+def edge_case_frame():
+    # Every combination of missing, zero, one and two for each count column, under each kind of network
+    networks = ['Tesla Destination', 'Tesla', 'FLO', None]
+    counts = [np.nan, 0.0, 1.0, 2.0]
+    rows = list(itertools.product(networks, *[counts] * len(COUNT_COLUMNS)))
+    return pd.DataFrame(rows, columns=['EV Network'] + COUNT_COLUMNS)
+
+
+def as_loaded(raw):
+    # The dtypes the chunked loader hands to flag_charging_ports: float32 counts, categorical networks
+    frame = raw.astype({col: STATION_DTYPES[col] for col in COUNT_COLUMNS})
+    frame['EV Network'] = frame['EV Network'].astype(network_dtype(frame['EV Network'].dropna().unique()))
+    return frame
+
+
+def assert_same_flags(vectorized, rowwise):
+    pd.testing.assert_frame_equal(
+        vectorized[FLAG_COLUMNS], rowwise[FLAG_COLUMNS], check_dtype=False
+    )
+    pd.testing.assert_series_equal(
+        vectorized['ChademoCCSsingleuseport'].fillna(0), rowwise['ChademoCCSsingleuseport'].fillna(0),
+        check_dtype=False
+    )
+
+
+def check_frame(raw):
+    # Both EV Network representations against the row-wise reference on the original frame
+    rowwise = flag_charging_ports_rowwise(raw.copy())
+    assert_same_flags(flag_charging_ports(raw.copy()), rowwise)
+    loaded = as_loaded(raw)
+    assert isinstance(loaded['EV Network'].dtype, pd.CategoricalDtype)
+    assert_same_flags(flag_charging_ports(loaded), rowwise)
+
+
+def test_flags_match_rowwise_on_edge_cases():
+    raw = edge_case_frame()
+    assert raw['EV Network'].isna().any()
+    check_frame(raw)
+
+
+def test_flags_match_rowwise_on_synthetic_rows():
+    check_frame(make_stations_frame(20_000, seed=1))
+
+
+def timed(func, frame):
+    start = time.perf_counter()
+    result = func(frame)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raw = make_stations_frame(args.rows, args.seed)
+    print(f"Synthetic frame: {len(raw):,} rows")
+
+    check_frame(edge_case_frame())
+    print("Edge cases identical (object and categorical networks): yes")
+
+    rowwise, rowwise_s = timed(flag_charging_ports_rowwise, raw.copy())
+    vectorized, vectorized_s = timed(flag_charging_ports, raw.copy())
+    assert_same_flags(vectorized, rowwise)
+    assert_same_flags(flag_charging_ports(as_loaded(raw)), rowwise)
+    print("Flags identical (object and categorical networks): yes")
+    print(f"Row-wise apply : {rowwise_s:8.2f} s")
+    print(f"Column-wise    : {vectorized_s:8.3f} s")
+    print(f"Speedup        : {rowwise_s / vectorized_s:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Times the KD-tree station index (app/spatial_index.py) against a linear scan on a synthetic extract:
+index build per filter, then k-nearest and radius queries from random points across Canada with and
+without level/network filters. Every query is checked against the brute-force answer.
+
+    python benchmarks/bench_spatial_index.py --rows 100k --queries 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import write_stations_csv  # also puts app/ on sys.path
+from bench_suite import parse_size
+from charging_data import load_processed_charging_ports
+from spatial_index import LEVEL_FILTERS, StationIndex, chord_to_km, to_unit_vectors
+
+FILTERS = [(None, None), ('L3', None), ('L2', ('Tesla',))]
+
+
+def brute_force(stations, vectors, lat, lon, level, networks):
+    # Distances in km to every station, inf where the filters exclude it
+    keep = np.ones(len(stations), dtype=bool)
+    if level is not None:
+        keep &= stations[LEVEL_FILTERS[level]].to_numpy() > 0
+    if networks is not None:
+        keep &= stations['EV Network'].isin(networks).to_numpy()
+    distances = chord_to_km(np.linalg.norm(vectors - to_unit_vectors(lat, lon), axis=1))
+    distances[~keep] = np.inf
+    return distances
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100k", help="Synthetic rows (k/M suffixes allowed)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=25.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "stations.csv")
+        write_stations_csv(csv_path, parse_size(args.rows), args.seed)
+        stations = load_processed_charging_ports(csv_path, os.path.join(workdir, "stations.feather"))
+
+    index = StationIndex(stations)
+    vectors = to_unit_vectors(stations['Latitude'].to_numpy(), stations['Longitude'].to_numpy())
+    rng = np.random.default_rng(args.seed)
+    points = np.column_stack([rng.uniform(42, 60, args.queries), rng.uniform(-130, -60, args.queries)])
+    print(f"{len(stations):,} ports, {args.queries} queries, k={args.k}, radius={args.radius_km} km")
+    print(f"{'filter':22}{'build ms':>10}{'knn p50 ms':>12}{'knn p99 ms':>12}{'radius p50 ms':>15}{'scan p50 ms':>13}")
+
+    for level, networks in FILTERS:
+        start = time.perf_counter()
+        index.nearest(0.0, 0.0, k=1, level=level, networks=networks)
+        build = time.perf_counter() - start
+
+        knn, radius, scan = [], [], []
+        for lat, lon in points:
+            start = time.perf_counter()
+            _, nearest_km = index.nearest(lat, lon, k=args.k, level=level, networks=networks)
+            knn.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            rows, _ = index.within(lat, lon, args.radius_km, level=level, networks=networks)
+            radius.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            distances = brute_force(stations, vectors, lat, lon, level, networks)
+            scan.append(time.perf_counter() - start)
+
+            expected = np.sort(distances)[:args.k]
+            assert np.allclose(nearest_km, expected[np.isfinite(expected)])
+            assert set(rows.tolist()) == set(np.flatnonzero(distances <= args.radius_km).tolist())
+
+        label = f"{level or 'any'}/{','.join(networks) if networks else 'all networks'}"
+        print(f"{label:22}{build * 1e3:10.1f}{np.median(knn) * 1e3:12.3f}{np.percentile(knn, 99) * 1e3:12.3f}"
+              f"{np.median(radius) * 1e3:15.3f}{np.median(scan) * 1e3:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+End-to-end benchmark of the data pipeline and the per-province page work, on synthetic NREL-shaped
+extracts (benchmarks/synthetic.py) of several sizes spread across every province and every network
+in network_bucket_map.
+
+For each size it times CSV ingest and flagging, the columnar cache, the province cube and density
+grid, the per-province widget data, the chart renders, the pricing tables, the pre-rendered page
+HTML and the map export, recording wall time, throughput and peak RSS growth. Results are compared
+against a JSON baseline: the first run on a machine writes it, later runs fail (exit status 1) when
+a case is slower than the baseline by more than --tolerance. Baselines are machine-specific, so
+keep one per deploy target.
+
+    python benchmarks/bench_suite.py --sizes 10k,100k,1M
+    python benchmarks/bench_suite.py --sizes 10k,100k --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from synthetic import PROVINCES, write_stations_csv  # also puts app/ on sys.path
+from charging_data import load_processed_charging_ports, process_charging_ports_data, read_processed_cache
+from chart_specs import CHARTS, chart_spec, operator_type_shares, port_counts
+from density_grid import build_density_grid
+from page_fragments import render_page_fragments
+from pricing import compile_pricing_store, get_filtered_table_by_level
+from profiling import current_rss
+from province_cube import build_province_cube, bucket_totals, province_slice
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Differences below this are timer noise, never a regression
+NOISE_FLOOR_S = 0.005
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+class PeakRSS:
+    # Samples the process RSS on a background thread; peak_mb is the growth over the starting RSS
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = self.start = current_rss() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss() or 0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss() or 0)
+
+    @property
+    def peak_mb(self):
+        return (self.peak - self.start) / 1e6
+
+
+def run_case(func, items, repeat):
+    """
+    Runs func once under the RSS sampler, then repeats it (up to `repeat` runs in total) while a run
+    takes under a second, and keeps the fastest time. items is the unit count for the throughput.
+    """
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        func()
+        best = time.perf_counter() - start
+    for _ in range(repeat - 1):
+        if best >= 1.0:
+            break
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": round(best, 6), "items_per_s": round(items / best, 1) if best else None,
+            "items": items, "peak_mb": round(rss.peak_mb, 1)}
+
+
+def bench_size(n_rows, args, workdir):
+    csv_path = os.path.join(workdir, f"stations_{n_rows}.csv")
+    cache_path = os.path.join(workdir, f"stations_{n_rows}.feather")
+    write_stations_csv(csv_path, n_rows, args.seed)
+    results = {}
+
+    def case(name, func, items):
+        results[name] = run_case(func, items, args.repeat)
+        print(f"  {name:38}{results[name]['seconds'] * 1e3:12.1f} ms{results[name]['items_per_s'] or 0:14,.0f}/s"
+              f"{results[name]['peak_mb']:10.1f} MB")
+
+    case("process_charging_ports_data", lambda: process_charging_ports_data(csv_path), n_rows)
+
+    def cold_load():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        load_processed_charging_ports(csv_path, cache_path)
+
+    case("load_processed (csv + cache write)", cold_load, n_rows)
+    case("load_processed (cache read)", lambda: read_processed_cache(csv_path, cache_path), n_rows)
+
+    charging_ports = read_processed_cache(csv_path, cache_path)
+    case("build_province_cube", lambda: build_province_cube(charging_ports), len(charging_ports))
+    case("build_density_grid", lambda: build_density_grid(charging_ports), len(charging_ports))
+    cube = build_province_cube(charging_ports)
+
+    # Per-province widget data, each function over every province
+    provinces = sorted(PROVINCES)
+    case("widget: province_slice x3", lambda: [province_slice(cube, prov, level) for prov in provinces
+                                               for level in ('All', 'L2_port', 'L3_port')], len(provinces))
+    case("widget: bucket_totals", lambda: [bucket_totals(cube, prov) for prov in provinces], len(provinces))
+    case("widget: port_counts", lambda: [port_counts(cube, prov) for prov in provinces], len(provinces))
+    case("widget: operator_type_shares x2", lambda: [operator_type_shares(cube, prov, level) for prov in provinces
+                                                     for level in ('L2_port', 'L3_port')], len(provinces))
+    case("widget: chart_spec x3", lambda: [chart_spec(cube, prov, chart) for prov in provinces for chart in CHARTS],
+         len(provinces))
+
+    if not args.skip_render:
+        from charts import render_chart
+
+        case("render_chart png x3 (ON)", lambda: [render_chart(cube, 'ON', chart) for chart in CHARTS], 3)
+
+    case("compile_pricing_store", lambda: compile_pricing_store(REPO_ROOT), 1)
+    pricing = compile_pricing_store(REPO_ROOT)
+    case("get_filtered_table_by_level x2", lambda: [get_filtered_table_by_level(prov, pricing, level, cube)
+                                                    for prov in provinces for level in ('L2', 'L3')], len(provinces))
+    case("render_page_fragments", lambda: render_page_fragments(cube, pricing, {prov: prov for prov in provinces}),
+         len(provinces))
+
+    if not args.skip_maps and n_rows <= args.max_map_rows:
+        sys.path.insert(0, os.path.join(REPO_ROOT, "Additional_Files"))
+        from download_maps_ import export_all_province_maps, plot_charging_map_by_province
+
+        largest = charging_ports['State'].value_counts().idxmax()
+        case(f"plot_charging_map_by_province ({largest}, bulk)",
+             lambda: plot_charging_map_by_province(charging_ports, largest, render="bulk").get_root().render(),
+             int((charging_ports['State'] == largest).sum()))
+
+        # A fresh output directory per run: in a reused one the manifest's content hashes would skip
+        # every write, and later repeats would time the no-op path without the gzip/brotli work
+        def export_maps():
+            export_all_province_maps(charging_ports, tempfile.mkdtemp(prefix=f"maps_{n_rows}_", dir=workdir),
+                                     render="bulk")
+
+        case("export_all_province_maps (bulk)", export_maps, len(charging_ports))
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Returns the (size, case, baseline s, current s) rows that got slower than allowed
+    regressions = []
+    for size, cases in results.items():
+        for name, result in cases.items():
+            reference = baseline.get("results", {}).get(size, {}).get(name)
+            if reference is None:
+                continue
+            before, after = reference["seconds"], result["seconds"]
+            if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_S:
+                regressions.append((size, name, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k,1M", help="Comma-separated row counts (k/M suffixes allowed)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case while a run takes under a second")
+    parser.add_argument("--skip-render", action="store_true", help="Skip the matplotlib chart renders")
+    parser.add_argument("--skip-maps", action="store_true", help="Skip the folium map cases")
+    parser.add_argument("--max-map-rows", type=int, default=100_000, help="Largest size the map cases run on")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    pd.set_option("mode.copy_on_write", True)
+    run = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes.split(","):
+            n_rows = parse_size(size)
+            print(f"\n{n_rows:,} rows")
+            run["results"][size.strip()] = bench_size(n_rows, args, workdir)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=1)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=1)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(run["results"], baseline, args.tolerance)
+    print(f"\nCompared with the baseline from {baseline['meta']['time']} ({baseline['meta']['machine']})")
+    for size, name, before, after in regressions:
+        print(f"  REGRESSION {size:>6} {name:38}{before * 1e3:10.1f} ms -> {after * 1e3:10.1f} ms")
+    if regressions:
+        sys.exit(1)
+    print(f"  no case slower than +{args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
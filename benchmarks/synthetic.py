@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from charging_data import network_bucket_map
+
+PROVINCES = ['AB', 'BC', 'MB', 'NB', 'NL', 'NS', 'ON', 'PE', 'QC', 'SK', 'YT', 'NT', 'NU']
+
+# Rough bounding boxes (lat_min, lat_max, lon_min, lon_max) so generated points land inside each province
+PROVINCE_BOUNDS = {
+    'AB': (49.0, 60.0, -120.0, -110.0), 'BC': (48.3, 60.0, -139.0, -114.0),
+    'MB': (49.0, 60.0, -102.0, -89.0), 'NB': (45.0, 48.0, -69.0, -64.0),
+    'NL': (46.6, 60.0, -67.8, -52.6), 'NS': (43.4, 47.0, -66.4, -59.7),
+    'ON': (41.7, 56.9, -95.2, -74.3), 'PE': (45.9, 47.1, -64.4, -62.0),
+    'QC': (45.0, 62.6, -79.8, -57.1), 'SK': (49.0, 60.0, -110.0, -101.4),
+    'YT': (60.0, 69.6, -141.0, -124.0), 'NT': (60.0, 78.0, -136.0, -102.0),
+    'NU': (60.0, 83.0, -120.0, -61.0),
+}
+
+
+def make_stations_frame(n_rows, seed=0):
+    """
+    Builds an NREL-shaped, one-row-per-charging-unit frame spread across all provinces and
+    every network in network_bucket_map (plus un-networked rows).
+    """
+    rng = np.random.default_rng(seed)
+    networks = np.array(list(network_bucket_map) + [None], dtype=object)
+
+    # Units come in sites of 1-6 ports sharing a station ID, network and coordinates
+    station_id = np.cumsum(rng.random(n_rows) < 0.35)
+    n_sites = station_id[-1] + 1 if n_rows else 0
+    site_state = rng.choice(PROVINCES, n_sites)
+    site_lat = np.empty(n_sites)
+    site_lon = np.empty(n_sites)
+    for prov, (lat_min, lat_max, lon_min, lon_max) in PROVINCE_BOUNDS.items():
+        mask = site_state == prov
+        site_lat[mask] = rng.uniform(lat_min, lat_max, mask.sum())
+        site_lon[mask] = rng.uniform(lon_min, lon_max, mask.sum())
+    site_network = rng.choice(networks, n_sites)
+
+    is_dc = rng.random(n_rows) < 0.25
+
+    def connector_count(p_one, mask):
+        counts = np.where(rng.random(n_rows) < p_one, 1.0, np.nan)
+        counts[~mask] = np.nan
+        return counts
+
+    return pd.DataFrame({
+        'ID': station_id,
+        'Station Name': np.char.add('Station ', station_id.astype(str)),
+        'Street Address': np.char.add(station_id.astype(str), ' Main St'),
+        'City': np.char.add('City ', (station_id % 500).astype(str)),
+        'State': site_state[station_id],
+        'EV Network': site_network[station_id],
+        'EV Level2 EVSE Num': np.where(is_dc, np.nan, 1.0),
+        'EV DC Fast Count': np.where(is_dc, 1.0, np.nan),
+        'EV J1772 Connector Count': connector_count(0.9, ~is_dc),
+        'EV J3400 Connector Count': connector_count(0.2, np.ones(n_rows, dtype=bool)),
+        'EV CCS Connector Count': connector_count(0.8, is_dc),
+        'EV CHAdeMO Connector Count': connector_count(0.4, is_dc),
+        'Latitude': site_lat[station_id],
+        'Longitude': site_lon[station_id],
+    })
+
+
+def write_stations_csv(path, n_rows, seed=0):
+    make_stations_frame(n_rows, seed).to_csv(path, index=False)
+    return path
@@ -0,0 +1,42 @@
+"""
+Regression checks for the chart pre-render: a province without ports of one level must not break the
+batch render of every other province.
+
+    python -m pytest benchmarks/test_charts.py
+"""
+import numpy as np
+import pandas as pd
+
+from synthetic import write_stations_csv  # also puts app/ on sys.path
+from charging_data import process_charging_ports_data
+from chart_specs import CHARTS, chart_spec
+from charts import prerender_charts
+from province_cube import build_province_cube
+
+
+def l2_only_cube(tmp_path, province='PE'):
+    # Synthetic extract where one province has only Level 2 units (no DC fast or J3400 connectors)
+    csv_path = write_stations_csv(tmp_path / "stations.csv", 5_000)
+    raw = pd.read_csv(csv_path)
+    rows = raw['State'] == province
+    raw.loc[rows, ['EV DC Fast Count', 'EV CCS Connector Count', 'EV CHAdeMO Connector Count',
+                   'EV J3400 Connector Count']] = np.nan
+    raw.loc[rows, ['EV Level2 EVSE Num', 'EV J1772 Connector Count']] = 1.0
+    raw.to_csv(csv_path, index=False)
+    return build_province_cube(process_charging_ports_data(csv_path))
+
+
+def test_prerender_skips_empty_level(tmp_path):
+    cube = l2_only_cube(tmp_path)
+    images = prerender_charts(cube, ['PE', 'ON'])
+
+    assert images[('PE', 'L3_port')] is None
+    for key in [('PE', 'ports'), ('PE', 'L2_port')] + [('ON', chart) for chart in CHARTS]:
+        assert images[key].startswith(b'\x89PNG'), key
+
+
+def test_client_spec_skips_empty_level(tmp_path):
+    cube = l2_only_cube(tmp_path)
+
+    assert chart_spec(cube, 'PE', 'L3_port') is None
+    assert chart_spec(cube, 'PE', 'L2_port')['data']['values']